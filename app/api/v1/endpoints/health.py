@@ -1,9 +1,55 @@
 import time
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.dispatcher import dispatcher
+from services.poller import poll_watchdog
 
 router = APIRouter(tags=["system"])
+# The dispatcher loop probes itself every 0.5s; no probe for this long means it is blocked
+MAX_LOOP_STALL = 10.0
+
+
+def _dispatcher_problem() -> str | None:
+    if not dispatcher.alive:
+        return "dispatcher is not running"
+    if time.monotonic() - dispatcher.probed_at > MAX_LOOP_STALL:
+        return "dispatcher event loop is blocked"
+    return None
+
+
+def _report(problems: list[str], details: dict) -> JSONResponse:
+    return JSONResponse(
+        {"status": "fail" if problems else "ok", "problems": problems, "timestamp": time.time(), **details},
+        status_code=503 if problems else 200,
+    )
 
 
 @router.get("/health")
 def health_check() -> dict:
     return {"status": "healthy", "timestamp": time.time()}
+
+
+@router.get("/health/live")
+def liveness() -> JSONResponse:
+    """Fails only when restarting the process would help."""
+    problem = _dispatcher_problem()
+    return _report([problem] if problem else [], {})
+
+
+@router.get("/health/ready")
+def readiness() -> JSONResponse:
+    """Fails when this instance is not receiving or delivering messages."""
+    problems = [p for p in (_dispatcher_problem(), poll_watchdog.problem()) if p]
+    poller = poll_watchdog.poller
+    runtime = dispatcher.runtime()
+    return _report(problems, {
+        "poll_lag_seconds": round(poller.lag(), 1) if poller else None,
+        "max_poll_lag_seconds": poll_watchdog.max_lag,
+        "last_poll": poller.last_poll if poller else None,
+        "last_poll_error": poller.last_error if poller else None,
+        "poller_restarts": poll_watchdog.restarts,
+        "queue_depth": sum(runtime["lanes"].values()),
+        "in_flight": runtime["in_flight"],
+        "loop_lag_ms": runtime["loop_lag_ms"],
+        "failing_webhooks": dispatcher.failing_webhooks(),
+    })
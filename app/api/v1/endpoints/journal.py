@@ -0,0 +1,43 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, HTTPException, Response
+from schemas.journal import ReplayRequest
+from services.journal import journal
+
+router = APIRouter(prefix="/journal", tags=["journal"])
+_NOT_FOUND = "Replay not found"
+
+
+@router.get("")
+def get_journal() -> dict:
+    return journal.snapshot()
+
+
+@router.post("/replays", status_code=202)
+def start_replay(data: ReplayRequest, response: Response) -> dict:
+    start, end = data.start.timestamp(), data.end.timestamp()
+    if data.dry_run:
+        response.status_code = 200
+        return {"matched": journal.count(start, end, data.chat_ids)}
+    return asdict(journal.start_replay(start, end, data.chat_ids, data.target_url))
+
+
+@router.get("/replays")
+def list_replays() -> list[dict]:
+    return [asdict(job) for job in journal.jobs()]
+
+
+@router.get("/replays/{job_id}")
+def get_replay(job_id: str) -> dict:
+    job = journal.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=_NOT_FOUND)
+    return asdict(job)
+
+
+@router.delete("/replays/{job_id}")
+def cancel_replay(job_id: str) -> dict:
+    job = journal.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=_NOT_FOUND)
+    return asdict(job)
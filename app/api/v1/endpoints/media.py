@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from services.media_cache import media_cache
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.get("/{name}")
+def get_media(name: str) -> FileResponse:
+    """Serve a prefetched media file. Supports HTTP Range requests."""
+    path = media_cache.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
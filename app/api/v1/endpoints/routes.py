@@ -1,44 +1,229 @@
-from fastapi import APIRouter, HTTPException
-from schemas.route import RouteCreate, RouteUpdate, CardNameUpdate
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterator, Literal
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from schemas.route import RouteCreate, RouteImportRow, RouteUpdate, CardNameUpdate
 from services.route_service import RouteService
 
 router = APIRouter(prefix="/routes", tags=["routes"])
 _svc = RouteService()
 _NOT_FOUND = "Route not found"
 
+BulkFormat = Literal["csv", "json"]
+# Nested settings (rate_limit, rules, delivery) only travel in JSON; a CSV import leaves them as they are
+CSV_COLUMNS = ("chat_id", "name", "target_urls", "priority", "reply")
+MAX_REPORTED_ERRORS = 100
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _options(data: RouteCreate | RouteUpdate) -> dict:
+    """Optional per-route settings, stored alongside name and target_urls."""
+    return data.model_dump(exclude={"chat_id", "name", "target_urls"}, exclude_defaults=True)
+
+
+def _changes(data: RouteImportRow) -> dict:
+    """Fields an imported row sets. A default or empty value clears the setting; target_urls is never cleared."""
+    fields = data.model_dump(exclude={"chat_id"}, exclude_unset=True)
+    if fields.get("target_urls") is None:
+        fields.pop("target_urls", None)
+    defaults = RouteImportRow.model_fields
+    return {k: None if v == defaults[k].default or v == "" else v for k, v in fields.items()}
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"] for e in error.errors()
+    )
+
+
+async def _lines(request: Request) -> AsyncIterator[str]:
+    """Decode the request body line by line as it arrives."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _rows(request: Request, format: BulkFormat) -> AsyncIterator[tuple[int, dict | str]]:
+    """(line number, route fields or a parse error) for each non-blank line of an import."""
+    header = None
+    number = 0
+    async for line in _lines(request):
+        number += 1
+        line = line.rstrip("\r")
+        if not line.strip():
+            continue
+        if format == "json":
+            if header is None and line.lstrip().startswith("["):
+                raise HTTPException(status_code=400, detail="JSON imports take one route object per line")
+            header = True
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = f"invalid JSON: {e}"
+            yield number, row if isinstance(row, (dict, str)) else "expected a JSON object"
+            continue
+
+        cells = [cell.strip() for cell in next(csv.reader([line]))]
+        if header is None:
+            header = [cell.lower() for cell in cells]
+            unknown = set(header) - set(CSV_COLUMNS)
+            if unknown or "chat_id" not in header:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"CSV header must name chat_id and only these columns: {', '.join(CSV_COLUMNS)}",
+                )
+            continue
+        if len(cells) > len(header):
+            yield number, f"{len(cells)} values for {len(header)} columns"
+            continue
+        row = {column: cell for column, cell in zip(header, cells) if cell}
+        if "target_urls" in row:
+            row["target_urls"] = row["target_urls"].split()
+        yield number, row
+
+
+def _export_csv(routes: dict) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for chat_id, route in routes.items():
+        writer.writerow([
+            chat_id,
+            route.get("name", chat_id),
+            " ".join(route.get("target_urls", [])),
+            route.get("priority", "normal"),
+            str(route.get("reply", False)).lower(),
+        ])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _export_json(routes: dict) -> Iterator[str]:
+    lines = []
+    size = 0
+    for chat_id, route in routes.items():
+        lines.append(json.dumps({"chat_id": chat_id, **route}, ensure_ascii=False) + "\n")
+        size += len(lines[-1])
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(lines)
+            lines, size = [], 0
+    yield "".join(lines)
+
 
 @router.get("")
 def get_routes() -> dict:
     return {"routes": _svc.get_all()}
 
 
+@router.get("/export")
+def export_routes(format: BulkFormat = "json") -> StreamingResponse:
+    routes = _svc.get_all()
+    if format == "csv":
+        body, media_type, filename = _export_csv(routes), "text/csv", "routes.csv"
+    else:
+        body, media_type, filename = _export_json(routes), "application/x-ndjson", "routes.jsonl"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/import")
+async def import_routes(request: Request, format: BulkFormat = "json", dry_run: bool = False) -> dict:
+    """
+    Create or update routes in bulk from CSV or JSON Lines, streamed in the body.
+
+    Every row is validated like ``POST /routes``, except that a row for an
+    existing route may leave out ``target_urls``. Fields a row leaves out keep
+    their current value. The batch is written all at once, in one atomic save.
+    If any row is invalid, nothing is written and the report comes back as a 422.
+    """
+    changes: dict[str, dict] = {}
+    seen: dict[str, int] = {}
+    errors = []
+    invalid = 0
+    rows = 0
+    try:
+        async for number, row in _rows(request, format):
+            rows += 1
+            error = row if isinstance(row, str) else None
+            if error is None:
+                try:
+                    data = RouteImportRow.model_validate(row)
+                except ValidationError as e:
+                    error = _describe(e)
+                else:
+                    if data.chat_id in seen:
+                        error = f"duplicate of line {seen[data.chat_id]}"
+                    else:
+                        seen[data.chat_id] = number
+                        changes[data.chat_id] = _changes(data)
+            if error is not None:
+                invalid += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    chat_id = row.get("chat_id") if isinstance(row, dict) else None
+                    errors.append({"line": number, "chat_id": chat_id, "error": error})
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import must be UTF-8 text")
+
+    counts = await run_in_threadpool(_svc.bulk_upsert, changes, dry_run or invalid > 0)
+    # Whether a route is new is only known under the config lock, so this check comes last
+    for chat_id in counts.pop("incomplete"):
+        invalid += 1
+        errors.append({"line": seen[chat_id], "chat_id": chat_id, "error": "target_urls: required for a new route"})
+    errors = sorted(errors, key=lambda e: e["line"])[:MAX_REPORTED_ERRORS]
+    report = {"dry_run": dry_run, "rows": rows, **counts, "invalid": invalid, "errors": errors}
+    if invalid and not dry_run:
+        raise HTTPException(status_code=422, detail=report)
+    return report
+
+
 @router.post("", status_code=201)
 def create_route(data: RouteCreate) -> dict:
-    if _svc.exists(data.chat_id):
+    try:
+        _svc.create(data.chat_id, data.name or data.chat_id, data.target_urls, _options(data))
+    except ValueError:
         raise HTTPException(status_code=400, detail="Route already exists")
-    _svc.create(data.chat_id, data.name or data.chat_id, data.target_urls)
     return {"message": "Route added"}
 
 
 @router.put("/{chat_id}")
 def update_route(chat_id: str, data: RouteUpdate) -> dict:
-    if not _svc.exists(chat_id):
+    try:
+        _svc.update(chat_id, data.target_urls, data.name, _options(data))
+    except KeyError:
         raise HTTPException(status_code=404, detail=_NOT_FOUND)
-    _svc.update(chat_id, data.target_urls, data.name)
     return {"message": "Route updated"}
 
 
 @router.delete("/{chat_id}")
 def delete_route(chat_id: str) -> dict:
-    if not _svc.exists(chat_id):
+    try:
+        _svc.delete(chat_id)
+    except KeyError:
         raise HTTPException(status_code=404, detail=_NOT_FOUND)
-    _svc.delete(chat_id)
     return {"message": "Route deleted"}
 
 
 @router.put("/{chat_id}/name")
 def rename_route(chat_id: str, data: CardNameUpdate) -> dict:
-    if not _svc.exists(chat_id):
+    try:
+        _svc.rename(chat_id, data.name)
+    except KeyError:
         raise HTTPException(status_code=404, detail=_NOT_FOUND)
-    _svc.rename(chat_id, data.name)
     return {"message": "Card name updated"}
@@ -1,6 +1,5 @@
-import yaml
 from fastapi import APIRouter, HTTPException
-from config_loader import load_config
+from config_loader import config_lock, load_config, save_config
 from core.config import settings as app_settings
 from schemas.settings import SettingsUpdate, SettingsResponse
 
@@ -15,12 +14,12 @@ def get_settings() -> dict:
 
 @router.post("")
 def update_settings(data: SettingsUpdate) -> dict:
-    config = load_config(app_settings.config_path)
-    config["green_api"]["instance_id"] = data.instance_id
-    config["green_api"]["token"] = data.token
-    try:
-        with open(app_settings.config_path, "w") as f:
-            yaml.dump(config, f)
-    except OSError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to write config: {e}")
+    with config_lock:
+        config = load_config(app_settings.config_path)
+        config["green_api"]["instance_id"] = data.instance_id
+        config["green_api"]["token"] = data.token
+        try:
+            save_config(config, app_settings.config_path)
+        except OSError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to write config: {e}")
     return {"message": "Settings updated"}
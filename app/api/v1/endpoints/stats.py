@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from services.dispatcher import dispatcher
+from services.replies import reply_sender
+from services.media_cache import media_cache
+
+router = APIRouter(prefix="/stats", tags=["system"])
+
+
+@router.get("/deliveries")
+def get_delivery_stats() -> dict:
+    return dispatcher.stats.snapshot()
+
+
+@router.get("/queues")
+def get_queue_depths() -> dict:
+    return dispatcher.runtime()
+
+
+@router.get("/replies")
+def get_reply_stats() -> dict:
+    return reply_sender.snapshot()
+
+
+@router.get("/media")
+def get_media_stats() -> dict:
+    return media_cache.snapshot()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Query
+from services.tracing import trace_store
+
+router = APIRouter(prefix="/traces", tags=["system"])
+
+
+@router.get("")
+def get_traces(limit: int = Query(default=100, ge=1, le=1000), chat_id: str | None = None) -> dict:
+    return {"traces": trace_store.recent(limit, chat_id)}
+
+
+@router.get("/summary")
+def get_trace_summary() -> dict:
+    return {"stages": trace_store.summary()}
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import routes, settings, restart, contacts, health, version
+from .endpoints import routes, settings, restart, contacts, health, version, stats, traces, media, journal
 
 api_router = APIRouter()
 api_router.include_router(health.router)
@@ -8,3 +8,7 @@ api_router.include_router(routes.router)
 api_router.include_router(settings.router)
 api_router.include_router(restart.router)
 api_router.include_router(contacts.router)
+api_router.include_router(stats.router)
+api_router.include_router(traces.router)
+api_router.include_router(media.router)
+api_router.include_router(journal.router)
@@ -1,10 +1,16 @@
-from whatsapp_chatbot_python import GreenAPIBot, Notification
+from whatsapp_chatbot_python import Notification
 from config_loader import load_config, ensure_config
 from config_watcher import start_config_watcher
+from services.dispatcher import dispatcher
+from services.rules import route_rules
+from services.poller import Poller, poll_watchdog
+from services.journal import journal
+from core.event_log import event_log, setup_logging
 from loguru import logger
-import httpx, asyncio
-from threading import Thread
+import asyncio
+from threading import RLock, Thread
 from web_manager import app  # Import FastAPI app
+from core.config import settings
 import uvicorn
 from typing import Dict, List
 import sys  # For exiting the application on critical errors
@@ -14,7 +20,7 @@ import json
 from datetime import datetime
 import concurrent.futures
 
-CONFIG_PATH = "config/config.yaml"
+CONFIG_PATH = settings.config_path
 
 # WebSocket connections manager
 class ConnectionManager:
@@ -87,26 +93,13 @@ config: Dict[str, Dict[str, List[str]]] = load_config(CONFIG_PATH)
 # Global bot reference
 bot = None
 bot_thread = None
+# Serialises replacing the bot between /restart, config reloads and the watchdog.
+# Never held while a Poller is constructed, since that calls Green API.
+bot_lock = RLock()
+bot_generation = 0   # bumped by every replacement; one that was overtaken drops its new bot
+replacing = 0        # replacements whose new poller is still being constructed
 
 # Helper functions for bot message handling
-def log_message_and_broadcast(message: str, level: str = "info"):
-    """Helper to log a message and broadcast it to websockets."""
-    # Map string levels to Loguru methods
-    if level == "info":
-        logger.info(message)
-    elif level == "warning":
-        logger.warning(message)
-    elif level == "error":
-        logger.error(message)
-    elif level == "success":
-        logger.success(message)
-    elif level == "debug":
-        logger.debug(message)
-    else:
-        logger.info(message)  # Default to info if level is unknown
-    
-    manager.safe_broadcast_log(message, level)
-
 def get_route_info(route_data, chat_id):
     """Parse route data and extract target URLs and route name."""
     if isinstance(route_data, list):
@@ -121,42 +114,50 @@ def get_route_info(route_data, chat_id):
     else:
         return [], chat_id
 
-async def forward_to_webhook(url: str, chat_id: str, payload: dict):
-    """Forward notification to a webhook URL."""
-    async with httpx.AsyncClient() as client:
-        try:
-            await client.post(
-                url,
-                json={"chatId": chat_id, "payload": payload},
-                timeout=5.0
-            )
-            log_message_and_broadcast(f"✅ Forwarded to {url}", "success")
-        except Exception as e:
-            log_message_and_broadcast(f"❌ Error forwarding to {url}: {e}", "error")
-
 def process_incoming_message(notification: Notification):
     """Process an incoming message and forward to configured webhooks."""
+    received_at = time.time()
     chat_id = notification.event["senderData"]["chatId"]
     routes = config.get("routes", {})
     route_data = routes.get(chat_id)
 
     if not route_data:
-        log_message_and_broadcast(f"🚫 No routes for chatId: {chat_id}", "warning")
+        event_log.routine(
+            "warning", "🚫 No routes for chatId: {key}",
+            "🚫 Ignored {count} messages from unrouted chat {key} in the last {interval}s", chat_id,
+        )
         return
 
     # Get target URLs and route name
     target_urls, route_name = get_route_info(route_data, chat_id)
     
     if not target_urls:
-        log_message_and_broadcast(f"🚫 No webhook URLs configured for {route_name} ({chat_id})", "warning")
+        event_log.log("warning", "🚫 No webhook URLs configured for {name} ({chat_id})", name=route_name, chat_id=chat_id)
+        return
+
+    # Journal every routed notification, even filtered ones, so any of them can be replayed
+    journal.append(chat_id, notification.event, received_at)
+
+    # Content rules run before any HTTP call; unmatched messages are dropped here
+    route = route_data if isinstance(route_data, dict) else {}
+    if not route_rules.allows(chat_id, route, notification.event):
+        for url in target_urls:
+            dispatcher.stats.record(chat_id, url, "filtered")
+        event_log.routine(
+            "debug", "🔎 Message from {name} ({key}) did not match the route rules",
+            "🔎 Filtered out {count} messages from {key} in the last {interval}s", chat_id, name=route_name,
+        )
         return
 
-    log_message_and_broadcast(f"➡️ Forwarding from {route_name} ({chat_id}) to {len(target_urls)} webhook(s)")
+    # Templates are only formatted if the line will actually be logged or broadcast
+    event_log.routine(
+        "info", "➡️ Forwarding from {name} ({key}) to {count} webhook(s)",
+        "➡️ Received {count} messages from {key} in the last {interval}s",
+        chat_id, name=route_name, count=len(target_urls),
+    )
     
-    # Forward to each webhook
-    payload = notification.event
-    for url in target_urls:
-        asyncio.run(forward_to_webhook(url, chat_id, payload))
+    # Hand off to the dispatcher; rate limits and delivery happen off the bot thread
+    dispatcher.submit(chat_id, target_urls, notification.event, route, received_at)
 
 def setup_message_handler(bot_instance):
     """Configure message handler for the bot."""
@@ -167,8 +168,15 @@ def setup_message_handler(bot_instance):
     
     return bot_instance
 
-def initialize_bot():
-    """Initialize the bot with current configuration."""
+def has_credentials() -> bool:
+    return bool(config["green_api"].get("instance_id", "").strip() and config["green_api"].get("token", "").strip())
+
+def initialize_bot(delete_backlog: bool = True):
+    """Initialize the bot with current configuration.
+
+    ``delete_backlog`` drops notifications queued while no bot was running;
+    the watchdog keeps them when it replaces a stalled poller.
+    """
     global bot, config
     
     # Check if credentials are configured
@@ -182,8 +190,11 @@ def initialize_bot():
         return None
 
     try:
-        # Create bot instance
-        new_bot = GreenAPIBot(instance_id, token)
+        # Create bot instance; api_url points at a dedicated cluster (or a local fake) if set
+        api_url = (config["green_api"].get("api_url") or "").strip().rstrip("/")
+        new_bot = Poller(
+            instance_id, token, host=api_url or None, delete_notifications_at_startup=delete_backlog
+        )
         
         # Configure message handler
         new_bot = setup_message_handler(new_bot)
@@ -201,31 +212,84 @@ def initialize_bot():
         return None
 
 def start_bot_thread(bot_instance):
-    """Start the bot in a separate thread."""
+    """Start the bot in a separate thread and hand it to the watchdog."""
+    poll_watchdog.watch(bot_instance, expected=has_credentials())
     if bot_instance:
-        thread = Thread(target=bot_instance.run_forever, daemon=True)
-        thread.start()
-        return thread
+        return bot_instance.start()
     return None
 
+def _begin_replacement() -> tuple[int, object]:
+    """Take the current bot out of service; returns the new generation and the old bot. Hold bot_lock."""
+    global bot, bot_thread, bot_generation, replacing
+    bot_generation += 1
+    replacing += 1
+    old_bot, bot, bot_thread = bot, None, None
+    return bot_generation, old_bot
+
+def _install_bot(generation: int, new_bot) -> bool:
+    """Start ``new_bot`` unless a later replacement began while it was being constructed."""
+    global bot, bot_thread, replacing
+    with bot_lock:
+        replacing -= 1
+        if generation != bot_generation:
+            return False
+        bot = new_bot
+        bot_thread = start_bot_thread(new_bot)
+        return True
+
+def recover_poller():
+    """Replace a stalled or dead poller, keeping the config and queued notifications."""
+    with bot_lock:
+        if replacing or poll_watchdog.problem() is None:
+            return  # a /restart or config reload is replacing it, or already has
+        generation, old_bot = _begin_replacement()
+    if old_bot:
+        old_bot.stop()
+    _install_bot(generation, initialize_bot(delete_backlog=False))
+
 def restart_bot_component():
     """Restart only the bot component."""
-    global bot, bot_thread
-    
     log_message = "🔄 Restarting bot component..."
     logger.info(log_message)
     manager.safe_broadcast_log(log_message, "info")
-    
+
+    with bot_lock:
+        generation, old_bot = _begin_replacement()
+    new_bot = None
+    try:
+        if _restart_bot_component(old_bot):
+            # Keep what the old poller left queued: draining it would never finish under steady traffic
+            new_bot = initialize_bot(delete_backlog=False)
+    except Exception as e:
+        log_message = f"❌ Error during bot restart: {e}"
+        logger.error(log_message)
+        manager.safe_broadcast_log(log_message, "error")
+    if not _install_bot(generation, new_bot):
+        logger.info("🔄 Bot restart superseded by a newer one")
+        return
+
+    if new_bot:
+        log_message = "✅ Bot restarted successfully"
+        logger.info(log_message)
+        manager.safe_broadcast_log(log_message, "success")
+    else:
+        log_message = "❌ Bot restart failed or bot not configured"
+        logger.error(log_message)
+        manager.safe_broadcast_log(log_message, "error")
+
+def _restart_bot_component(old_bot) -> bool:
+    """Stop ``old_bot`` and reload the configuration; returns False if the config could not be loaded."""
+    global config
+
     # Stop existing bot if running
-    if bot:
+    if old_bot:
         try:
             log_message = "🛑 Stopping existing bot instance..."
             logger.info(log_message)
             manager.safe_broadcast_log(log_message, "info")
             
-            # Set bot to None to stop processing new messages
-            bot = None
-            bot_thread = None
+            # Stop polling; the thread exits once its current long poll returns
+            old_bot.stop()
             
             # Give a moment for any ongoing operations to complete
             time.sleep(1)
@@ -239,9 +303,13 @@ def restart_bot_component():
     time.sleep(0.5)
     
     # Reload configuration
-    global config
     try:
         config = load_config(CONFIG_PATH)
+        dispatcher.configure(config)
+        route_rules.configure(config.get("routes"))
+        journal.configure(config.get("journal"))
+        event_log.configure(config.get("logging"))
+        poll_watchdog.configure(config.get("watchdog"))
         log_message = "📁 Configuration reloaded"
         logger.info(log_message)
         manager.safe_broadcast_log(log_message, "info")
@@ -249,26 +317,8 @@ def restart_bot_component():
         log_message = f"❌ Failed to reload config: {e}"
         logger.error(log_message)
         manager.safe_broadcast_log(log_message, "error")
-        return
-    
-    # Initialize new bot with updated config
-    try:
-        bot = initialize_bot()
-        bot_thread = start_bot_thread(bot)
-        
-        if bot:
-            log_message = "✅ Bot restarted successfully"
-            logger.info(log_message)
-            manager.safe_broadcast_log(log_message, "success")
-        else:
-            log_message = "❌ Bot restart failed or bot not configured"
-            logger.error(log_message)
-            manager.safe_broadcast_log(log_message, "error")
-            
-    except Exception as e:
-        log_message = f"❌ Error during bot restart: {e}"
-        logger.error(log_message)
-        manager.safe_broadcast_log(log_message, "error")
+        return False
+    return True
 
 def reload_config(new_config: Dict[str, Dict[str, List[str]]]) -> None:
     """
@@ -282,6 +332,11 @@ def reload_config(new_config: Dict[str, Dict[str, List[str]]]) -> None:
     old_token = config["green_api"].get("token", "").strip()
     
     config = new_config
+    dispatcher.configure(config)
+    route_rules.configure(config.get("routes"))
+    journal.configure(config.get("journal"))
+    event_log.configure(config.get("logging"))
+    poll_watchdog.configure(config.get("watchdog"))
     
     new_instance_id = config["green_api"].get("instance_id", "").strip()
     new_token = config["green_api"].get("token", "").strip()
@@ -297,19 +352,17 @@ def reload_config(new_config: Dict[str, Dict[str, List[str]]]) -> None:
         logger.info(log_message)
         manager.safe_broadcast_log(log_message, "info")
 
-start_config_watcher(CONFIG_PATH, reload_config)
-
 def run_web_manager():
     """
     Starts the FastAPI web server using Uvicorn.
     """
     try:
-        config = uvicorn.Config(app, host="0.0.0.0", port=8000, log_level="info")
+        config = uvicorn.Config(app, host="0.0.0.0", port=settings.port, log_level="info")
         server = uvicorn.Server(config)
         server.run()
     except OSError as e:
         if "address already in use" in str(e).lower():
-            log_message = "⚠️ Port 8000 already in use - web server may already be running"
+            log_message = f"⚠️ Port {settings.port} already in use - web server may already be running"
             logger.warning(log_message)
             manager.safe_broadcast_log(log_message, "warning")
         else:
@@ -332,24 +385,50 @@ def is_port_in_use(port):
         except OSError:
             return True
 
-# Initialize bot
-bot = initialize_bot()
-bot_thread = start_bot_thread(bot)
+def main():
+    """Start the dispatcher, bot and web server, then keep the main thread alive."""
+    global bot, bot_thread
 
-# Only start web server if port is available
-if not is_port_in_use(8000):
-    Thread(target=run_web_manager, daemon=True).start()
-    log_message = "🌐 Web server starting on port 8000"
-    logger.info(log_message)
-    manager.safe_broadcast_log(log_message, "info")
-else:
-    log_message = "⚠️ Port 8000 already in use - assuming web server is already running"
-    logger.warning(log_message)
-    manager.safe_broadcast_log(log_message, "warning")
-
-# Keep the main thread alive
-try:
-    while True:
-        time.sleep(1)
-except KeyboardInterrupt:
-    logger.info("🛑 Shutting down...")
+    start_config_watcher(CONFIG_PATH, reload_config)
+
+    setup_logging(config.get("logging"))
+    event_log.configure(
+        config.get("logging"),
+        broadcast=manager.safe_broadcast_log,
+        has_listeners=lambda: bool(manager.active_connections),
+    )
+
+    # Start the webhook dispatcher before the bot can hand it any messages
+    dispatcher.start(config)
+    route_rules.configure(config.get("routes"))
+    journal.configure(config.get("journal"))
+
+    # Initialize bot
+    bot = initialize_bot()
+    bot_thread = start_bot_thread(bot)
+    poll_watchdog.configure(config.get("watchdog"))
+    poll_watchdog.start(recover_poller)
+
+    # Only start web server if port is available
+    if not is_port_in_use(settings.port):
+        Thread(target=run_web_manager, daemon=True).start()
+        log_message = f"🌐 Web server starting on port {settings.port}"
+        logger.info(log_message)
+        manager.safe_broadcast_log(log_message, "info")
+    else:
+        log_message = f"⚠️ Port {settings.port} already in use - assuming web server is already running"
+        logger.warning(log_message)
+        manager.safe_broadcast_log(log_message, "warning")
+
+    # Keep the main thread alive
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("🛑 Shutting down...")
+
+if __name__ == "__main__":
+    # Endpoints reach the running bot with ``import app``; make that resolve to
+    # this module instead of executing a second copy of it.
+    sys.modules.setdefault("app", sys.modules[__name__])
+    main()
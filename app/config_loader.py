@@ -1,8 +1,23 @@
+import copy
 import os
+import pickle
+import tempfile
+import threading
 import yaml
 from loguru import logger
 from typing import Dict, List, Union
 
+# libyaml is an order of magnitude faster on large route tables; fall back to pure Python
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Serialises read-modify-write cycles on the config file within this process.
+config_lock = threading.RLock()
+
+# (path, stat key, pickled config) of the last parse; pickle round-trips are far
+# cheaper than re-parsing YAML and hand every caller its own mutable copy.
+_cache: tuple[str, tuple, bytes] | None = None
+
 DEFAULT_CONFIG: Dict[str, Union[Dict[str, str], Dict[str, Union[str, List[str]]]]] = {
     "green_api": {
         "instance_id": "",
@@ -93,20 +108,64 @@ def load_config(path: str = "config/config.yaml") -> Dict:
     Returns:
         Dict: The loaded configuration.
     """
+    global _cache
     if not os.path.exists(path):
         logger.error(f"Config file not found at {path}. Using default configuration.")
-        return DEFAULT_CONFIG
+        return copy.deepcopy(DEFAULT_CONFIG)
 
     try:
+        key = _stat_key(path)
+        cached = _cache
+        if cached is not None and cached[0] == path and cached[1] == key:
+            return pickle.loads(cached[2])
+
         with open(path, "r") as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=_Loader)
             if not config:
                 logger.error("Config file is empty or invalid. Using default configuration.")
-                return DEFAULT_CONFIG
+                return copy.deepcopy(DEFAULT_CONFIG)
             
             # Migrate legacy format if needed
             config = migrate_legacy_config(config)
+            _cache = (path, key, pickle.dumps(config))
             return config
     except Exception as e:
         logger.error(f"Failed to load config file at {path}: {e}. Using default configuration.")
-        return DEFAULT_CONFIG
+        return copy.deepcopy(DEFAULT_CONFIG)
+
+def save_config(config: Dict, path: str = "config/config.yaml") -> None:
+    """
+    Writes the configuration atomically: dump to a temporary file in the same
+    directory, then rename it over the original, so readers never see a partial file.
+    Falls back to rewriting in place when the file cannot be replaced (e.g. when
+    config.yaml itself is a Docker bind mount).
+
+    Callers doing read-modify-write should hold ``config_lock``.
+
+    Args:
+        config (Dict): The configuration to write.
+        path (str): Path to the configuration file.
+    """
+    global _cache
+    data = yaml.dump(config, Dumper=_Dumper)
+    fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            with open(path, "w") as f:
+                f.write(data)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    _cache = (path, _stat_key(path), pickle.dumps(migrate_legacy_config(config)))
+
+def _stat_key(path: str) -> tuple:
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
@@ -2,7 +2,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from threading import Thread
 import time
-from config_loader import load_config
+from config_loader import config_lock, load_config
 
 class ConfigHandler(FileSystemEventHandler):
     """
@@ -19,8 +19,20 @@ class ConfigHandler(FileSystemEventHandler):
         Reloads the configuration and calls the callback.
         """
         if event.src_path.endswith(self.path):
+            self._reload()
+
+    def on_moved(self, event):
+        """
+        Triggered when a file is renamed over the configuration file,
+        which is how it is written atomically.
+        """
+        if event.dest_path.endswith(self.path):
+            self._reload()
+
+    def _reload(self):
+        with config_lock:
             config = load_config(self.path)
-            self.callback(config)
+        self.callback(config)
 
 def start_config_watcher(config_path: str, on_reload: callable) -> None:
     """
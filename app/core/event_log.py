@@ -0,0 +1,135 @@
+import sys
+import threading
+from collections import Counter
+from typing import Callable
+
+from loguru import logger
+
+from core.config import settings
+
+LEVELS = {"debug": 10, "info": 20, "success": 25, "warning": 30, "error": 40, "critical": 50}
+DELIVERY_MODES = ("all", "sample", "aggregate")
+# (handler id, level, serialize) of the sink installed by setup_logging
+_sink: tuple[int, str, bool] | None = None
+
+
+def setup_logging(options: dict | None = None) -> None:
+    """
+    Replace loguru's default stderr handler with an enqueued one.
+
+    Records are handed to a background thread for writing, so the bot and
+    dispatcher threads never block on stderr. ``format: json`` emits one JSON
+    object per line for log shippers. Calling it again with a different level
+    or format swaps the sink; the new one is added before the old one goes,
+    so no records are lost.
+    """
+    global _sink
+    options = options or {}
+    level = str(options.get("level", settings.log_level)).upper()
+    level = level if level.lower() in LEVELS else "INFO"
+    serialize = options.get("format") == "json"
+    if _sink is not None and _sink[1:] == (level, serialize):
+        return
+    if _sink is None:
+        logger.remove()
+    handler = logger.add(sys.stderr, level=level, enqueue=True, serialize=serialize)
+    if _sink is not None:
+        logger.remove(_sink[0])
+    _sink = (handler, level, serialize)
+
+
+class EventLog:
+    """
+    Log and broadcast to the Logs tab, cheaply enough for the per-message hot path.
+
+    Messages are templates formatted only when someone will see them: either
+    the level passes the configured minimum or a Logs tab is connected.
+    Per-message success lines go through ``routine``. Depending on
+    ``logging.delivery_lines``, they are logged one by one (``all``), one in
+    ``sample_every`` (``sample``), or as a periodic count per subject
+    (``aggregate``). Warnings and errors from ``log`` are never sampled.
+    """
+
+    def __init__(self) -> None:
+        self._min_level = LEVELS["debug"]
+        self._broadcast: Callable[[str, str], None] | None = None
+        self._has_listeners: Callable[[], bool] = lambda: False
+        self._mode = "all"
+        self._sample_every = 100
+        self._interval = 10.0
+        self._lock = threading.Lock()
+        self._seen: Counter = Counter()
+        self._counts: Counter = Counter()
+        self._flusher: threading.Thread | None = None
+
+    def configure(
+        self,
+        options: dict | None = None,
+        broadcast: Callable[[str, str], None] | None = None,
+        has_listeners: Callable[[], bool] | None = None,
+    ) -> None:
+        options = options or {}
+        if _sink is not None:
+            setup_logging(options)   # keep the sink's level in step with the gate below
+        self._min_level = LEVELS.get(str(options.get("level", settings.log_level)).lower(), LEVELS["info"])
+        mode = options.get("delivery_lines", "all")
+        self._mode = mode if mode in DELIVERY_MODES else "all"
+        self._sample_every = max(1, int(options.get("sample_every", 100)))
+        self._interval = float(options.get("aggregate_interval", 10))
+        if broadcast is not None:
+            self._broadcast = broadcast
+        if has_listeners is not None:
+            self._has_listeners = has_listeners
+        if self._mode != "all" and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_forever, name="log-aggregator", daemon=True)
+            self._flusher.start()
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self._min_level or self._has_listeners()
+
+    def emit(self, level: str, message: str) -> None:
+        """Log an already formatted message and broadcast it."""
+        if LEVELS[level] >= self._min_level:
+            logger.log(level.upper(), message)
+        if self._broadcast is not None:
+            self._broadcast(message, level)
+
+    def log(self, level: str, template: str, **fields) -> None:
+        if self.enabled(level):
+            self.emit(level, template.format(**fields) if fields else template)
+
+    def routine(self, level: str, template: str, summary: str, key: str, **fields) -> None:
+        """
+        A line that repeats for every message, e.g. a successful delivery.
+
+        ``summary`` is used in aggregate mode and may reference ``{count}``,
+        ``{key}`` and ``{interval}``.
+        """
+        if self._mode == "all":
+            self.log(level, template, key=key, **fields)
+        elif self._mode == "sample":
+            with self._lock:
+                self._seen[key] += 1
+                n = self._seen[key]
+            if n % self._sample_every == 1 or self._sample_every == 1:
+                self.log(level, template + " (1 in {every} shown)", key=key, every=self._sample_every, **fields)
+        else:
+            with self._lock:
+                self._counts[(level, summary, key)] += 1
+
+    def flush(self) -> None:
+        """Log the aggregated counts and restart sampling, so per-key counters don't pile up."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._seen = Counter()
+        for (level, summary, key), count in counts.items():
+            self.log(level, summary, count=f"{count:,}", key=key, interval=f"{self._interval:g}")
+
+    def _flush_forever(self) -> None:
+        event = threading.Event()
+        while not event.wait(self._interval):
+            self.flush()
+
+
+# Module-level singleton shared by the bot thread, the dispatcher and the API
+event_log = EventLog()
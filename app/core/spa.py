@@ -0,0 +1,170 @@
+"""
+Precompressed, cache-friendly serving of the Angular build.
+
+Run as a script to precompress a build ahead of time (the Dockerfile does this):
+
+    python core/spa.py static/dist/browser
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone still helps
+    brotli = None
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".txt", ".map", ".webmanifest", ".xml", ".ico"}
+MIN_COMPRESS_SIZE = 1024
+# Angular's build names bundles like main-ABC123XY.js; their content never changes
+HASHED_RE = re.compile(r"-[A-Z0-9]{8}\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _encodings() -> list[str]:
+    return [e for e in ENCODINGS if e != "br" or brotli is not None]
+
+
+def precompress(root: Path) -> int:
+    """Write missing or stale ``.br``/``.gz`` siblings for compressible files; returns how many."""
+    written = 0
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE or path.stat().st_size < MIN_COMPRESS_SIZE:
+            continue
+        data = None
+        for encoding in _encodings():
+            target = path.with_name(path.name + ENCODINGS[encoding])
+            if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            data = data if data is not None else path.read_bytes()
+            compressed = _compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(compressed)
+            os.replace(tmp, target)
+            written += 1
+    return written
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name.lower())
+    return accepted
+
+
+@dataclass
+class Asset:
+    path: Path
+    stat: os.stat_result
+    media_type: str
+    etag: str
+    cache_control: str
+    # Content-Encoding -> (path, stat) of the precompressed file
+    variants: dict[str, tuple[Path, os.stat_result]] = field(default_factory=dict)
+
+
+class SpaAssets:
+    """
+    Index of the Angular build, computed once at startup.
+
+    Requests are looked up in a dict of known paths instead of resolving and
+    stat-ing the filesystem, which also makes path traversal impossible.
+    Precompressed ``.br``/``.gz`` variants are chosen by ``Accept-Encoding``.
+    Hashed bundles are cached forever. ``index.html`` and everything else are
+    revalidated with an ETag. ``index.html`` itself is served from memory, and
+    it is the fallback for client-side routes.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._assets: dict[str, Asset] = {}
+        self._index: dict[str | None, bytes] = {}
+        self._index_etag = ""
+        if not root.is_dir():
+            return
+        try:
+            precompress(root)
+        except OSError:
+            pass  # read-only build directory; serve what is there
+        for path in root.rglob("*"):
+            if not path.is_file() or path.suffix == ".tmp":
+                continue
+            if path.suffix in (".br", ".gz") and path.with_suffix("").is_file():
+                continue  # a variant, attached to its original below
+            rel = path.relative_to(root).as_posix()
+            stat = path.stat()
+            asset = Asset(
+                path=path,
+                stat=stat,
+                media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+                etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+                cache_control=IMMUTABLE if HASHED_RE.search(path.name) else REVALIDATE,
+            )
+            for encoding in _encodings():
+                variant = path.with_name(path.name + ENCODINGS[encoding])
+                if variant.is_file():
+                    asset.variants[encoding] = (variant, variant.stat())
+            self._assets[rel] = asset
+
+        index = root / "index.html"
+        if index.is_file():
+            html = index.read_bytes()
+            self._index = {None: html, **{e: _compress(html, e) for e in _encodings()}}
+            self._index_etag = f'"{hashlib.sha256(html).hexdigest()[:32]}"'
+
+    @property
+    def built(self) -> bool:
+        return bool(self._index)
+
+    def response(self, full_path: str, request: Request) -> Response:
+        accepted = accepted_encodings(request)
+        asset = self._assets.get(full_path)
+        if asset is None or full_path == "index.html":
+            encoding = next((e for e in ENCODINGS if e in accepted and e in self._index), None)
+            headers = self._headers(REVALIDATE, self._index_etag, encoding)
+            if request.headers.get("if-none-match") == headers["ETag"]:
+                return Response(status_code=304, headers=headers)
+            return Response(self._index[encoding], media_type="text/html", headers=headers)
+
+        encoding = next((e for e in asset.variants if e in accepted), None)
+        headers = self._headers(asset.cache_control, asset.etag, encoding)
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        path, stat = asset.variants[encoding] if encoding else (asset.path, asset.stat)
+        return FileResponse(path, stat_result=stat, media_type=asset.media_type, headers=headers)
+
+    @staticmethod
+    def _headers(cache_control: str, etag: str, encoding: str | None) -> dict:
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding", "ETag": etag}
+        if encoding:
+            # Each encoding is its own representation, so it gets its own ETag
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+        return headers
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "static/dist/browser")
+    print(f"Precompressed {precompress(target)} files in {target}")
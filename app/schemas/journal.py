@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, field_validator, model_validator
+
+from schemas.route import _validate_urls
+
+
+class ReplayRequest(BaseModel):
+    start: datetime                 # ISO 8601 or epoch seconds; naive times are UTC
+    end: datetime
+    target_url: str
+    chat_ids: list[str] = []        # empty replays every chat
+    dry_run: bool = False           # only count the matching notifications
+
+    @field_validator("start", "end")
+    @classmethod
+    def assume_utc(cls, v: datetime) -> datetime:
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
+
+    @field_validator("target_url")
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        return _validate_urls([v])[0]
+
+    @field_validator("chat_ids")
+    @classmethod
+    def strip_blanks(cls, v: list[str]) -> list[str]:
+        return [chat_id.strip() for chat_id in v if chat_id.strip()]
+
+    @model_validator(mode="after")
+    def require_order(self) -> "ReplayRequest":
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        return self
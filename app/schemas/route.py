@@ -1,8 +1,14 @@
+import re
 import urllib.parse
 
-from pydantic import AnyHttpUrl, BaseModel, field_validator
+from pydantic import AnyHttpUrl, BaseModel, Field, TypeAdapter, field_validator, model_validator
 from pydantic import ValidationError as PydanticValidationError
-from typing import Optional
+from typing import Literal, Optional
+
+
+Priority = Literal["high", "normal", "low"]
+# Calling AnyHttpUrl() directly does not validate on every pydantic 2.x release
+_http_url = TypeAdapter(AnyHttpUrl)
 
 
 def _validate_urls(v: list[str]) -> list[str]:
@@ -14,7 +20,7 @@ def _validate_urls(v: list[str]) -> list[str]:
         if not url:
             raise ValueError(f"URL {i + 1} cannot be empty")
         try:
-            AnyHttpUrl(url)
+            _http_url.validate_python(url)
         except (ValueError, PydanticValidationError):
             raise ValueError(f"URL {i + 1} must be a valid http:// or https:// URL")
         # AnyHttpUrl can normalise malformed paths into hosts (e.g. http:///foo ->
@@ -27,10 +33,80 @@ def _validate_urls(v: list[str]) -> list[str]:
     return validated
 
 
+class RateLimit(BaseModel):
+    rate: Optional[float] = Field(default=None, gt=0)  # messages per second
+    burst: Optional[int] = Field(default=None, ge=1)
+    max_in_flight: Optional[int] = Field(default=None, ge=1)
+    policy: Literal["delay", "coalesce", "shed"] = "delay"
+
+    @model_validator(mode="after")
+    def require_a_limit(self) -> "RateLimit":
+        if self.rate is None and self.max_in_flight is None:
+            raise ValueError("Rate limit needs a rate, a max in-flight cap, or both")
+        return self
+
+
+class DeliveryPolicy(BaseModel):
+    """How webhook calls are made. Per-URL settings under ``webhooks`` override these."""
+    timeout: Optional[float] = Field(default=None, gt=0, le=300)   # seconds; default dispatcher.timeout
+    mode: Literal["await", "fire_and_forget"] = "await"
+    retries: int = Field(default=0, ge=0, le=10)   # extra attempts after a timeout, connection error, 429 or 5xx
+    hedge_url: Optional[str] = None                 # also call this URL if the first is slow
+    hedge_after_ms: Optional[float] = Field(default=None, gt=0)
+
+    @field_validator("hedge_url")
+    @classmethod
+    def validate_hedge_url(cls, v: Optional[str]) -> Optional[str]:
+        return _validate_urls([v])[0] if v is not None else None
+
+    @model_validator(mode="after")
+    def require_hedge_pair(self) -> "DeliveryPolicy":
+        if (self.hedge_url is None) != (self.hedge_after_ms is None):
+            raise ValueError("Hedging needs both a hedge URL and a hedge delay")
+        if self.hedge_after_ms is not None and self.timeout is not None and self.hedge_after_ms >= self.timeout * 1000:
+            raise ValueError("Hedge delay must be shorter than the timeout")
+        return self
+
+
+class MessageRules(BaseModel):
+    """Forward only messages that pass every configured condition."""
+    message_types: list[str] = []   # e.g. textMessage, imageMessage
+    keywords: list[str] = []        # whole words or phrases in the text or caption
+    patterns: list[str] = []        # regular expressions searched in the text or caption
+    senders: list[str] = []         # group participants, e.g. 972501234567@c.us
+    case_sensitive: bool = False
+
+    @field_validator("message_types", "keywords", "senders")
+    @classmethod
+    def strip_blanks(cls, v: list[str]) -> list[str]:
+        return [item.strip() for item in v if item.strip()]
+
+    @field_validator("patterns")
+    @classmethod
+    def validate_patterns(cls, v: list[str]) -> list[str]:
+        for i, pattern in enumerate(v):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Pattern {i + 1} is not a valid regular expression: {e}")
+        return v
+
+    @model_validator(mode="after")
+    def require_a_condition(self) -> "MessageRules":
+        if not (self.message_types or self.keywords or self.patterns or self.senders):
+            raise ValueError("Rules need at least one message type, keyword, pattern or sender")
+        return self
+
+
 class RouteCreate(BaseModel):
     chat_id: str
     target_urls: list[str]
     name: Optional[str] = None
+    rate_limit: Optional[RateLimit] = None
+    priority: Priority = "normal"
+    rules: Optional[MessageRules] = None
+    reply: bool = False   # send replies from the webhook response back to the chat
+    delivery: Optional[DeliveryPolicy] = None
 
     @field_validator("target_urls")
     @classmethod
@@ -41,6 +117,11 @@ class RouteCreate(BaseModel):
 class RouteUpdate(BaseModel):
     target_urls: list[str]
     name: Optional[str] = None
+    rate_limit: Optional[RateLimit] = None
+    priority: Priority = "normal"
+    rules: Optional[MessageRules] = None
+    reply: bool = False
+    delivery: Optional[DeliveryPolicy] = None
 
     @field_validator("target_urls")
     @classmethod
@@ -48,6 +129,16 @@ class RouteUpdate(BaseModel):
         return _validate_urls(v)
 
 
+class RouteImportRow(RouteCreate):
+    """One row of a bulk import. ``target_urls`` may be left out when the row updates an existing route."""
+    target_urls: Optional[list[str]] = None
+
+    @field_validator("target_urls")
+    @classmethod
+    def validate_urls(cls, v: Optional[list[str]]) -> Optional[list[str]]:
+        return _validate_urls(v) if v is not None else None
+
+
 class CardNameUpdate(BaseModel):
     name: str
 
@@ -55,6 +146,11 @@ class CardNameUpdate(BaseModel):
 class RouteData(BaseModel):
     name: str
     target_urls: list[str]
+    rate_limit: Optional[RateLimit] = None
+    priority: Priority = "normal"
+    rules: Optional[MessageRules] = None
+    reply: bool = False
+    delivery: Optional[DeliveryPolicy] = None
 
 
 class RoutesListResponse(BaseModel):
@@ -1,5 +1,9 @@
+import asyncio
+import heapq
+import threading
 import httpx
 from datetime import datetime
+from loguru import logger
 from config_loader import load_config
 from core.config import settings
 
@@ -9,6 +13,14 @@ class ContactsService:
         self._cache: list[dict] | None = None
         self._cache_time: datetime | None = None
         self._cache_ttl = 300  # seconds
+        # (contacts, lower-cased "name\0id" per contact) swapped in as one pair, so search
+        # is one substring test per contact and never sees a list from another fetch
+        self._indexed: tuple[list[dict], list[str]] = ([], [])
+        # chatId -> contact, swapped in whole so other threads can read it without locking
+        self._by_id: dict[str, dict] = {}
+        self._fetch_lock = asyncio.Lock()
+        self._refresh_interval = 0.0
+        self._refresher: threading.Thread | None = None
 
     def is_cache_valid(self) -> bool:
         if self._cache_time is None or self._cache is None:
@@ -20,7 +32,7 @@ class ContactsService:
         ga = config["green_api"]
         instance_id = ga.get("instance_id", "").strip()
         token = ga.get("token", "").strip()
-        api_url = ga.get("api_url", "https://api.green-api.com").strip().rstrip("/")
+        api_url = (ga.get("api_url") or "https://api.green-api.com").strip().rstrip("/")
         if not instance_id or not token:
             raise ValueError("Green API credentials not configured")
         return instance_id, token, api_url
@@ -28,11 +40,50 @@ class ContactsService:
     async def get_contacts(self) -> tuple[list[dict], bool]:
         if self.is_cache_valid() and self._cache is not None:
             return self._cache, True
-        instance_id, token, api_url = self._get_credentials()
-        contacts = await self._fetch(instance_id, token, api_url)
+        # One fetch at a time; requests that queued behind it reuse its result
+        async with self._fetch_lock:
+            if self.is_cache_valid() and self._cache is not None:
+                return self._cache, True
+            instance_id, token, api_url = self._get_credentials()
+            contacts = await self._fetch(instance_id, token, api_url)
+            self._store(contacts)
+        return contacts, False
+
+    def _store(self, contacts: list[dict]) -> None:
+        self._indexed = (contacts, [self._search_key(c) for c in contacts])
+        self._by_id = {c["id"]: c for c in contacts}
         self._cache = contacts
         self._cache_time = datetime.now()
-        return contacts, False
+
+    def lookup(self, chat_id: str) -> dict | None:
+        """Contact for a chat ID from the last fetch, without any I/O. Safe from any thread."""
+        return self._by_id.get(chat_id)
+
+    def set_refresh_interval(self, interval: float) -> None:
+        """
+        Keep the contact index fresh from a background thread, every ``interval`` seconds.
+
+        An interval of 0 pauses the refresh.
+        """
+        self._refresh_interval = interval
+        if interval > 0 and self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_forever, name="contacts-refresh", daemon=True)
+            self._refresher.start()
+
+    def _refresh_forever(self) -> None:
+        wake = threading.Event()
+        while True:
+            if self._refresh_interval <= 0:
+                wake.wait(60)
+                continue
+            try:
+                contacts = asyncio.run(self._fetch(*self._get_credentials()))
+                self._store(contacts)
+            except ValueError:
+                pass  # credentials not configured yet
+            except Exception as e:
+                logger.warning(f"⚠️ Contact index refresh failed: {e}")
+            wake.wait(self._refresh_interval)
 
     async def _fetch(self, instance_id: str, token: str, api_url: str) -> list[dict]:
         url = f"{api_url}/waInstance{instance_id}/getContacts/{token}"
@@ -53,24 +104,28 @@ class ContactsService:
         contacts.sort(key=lambda x: x["name"].lower())
         return contacts
 
+    @staticmethod
+    def _search_key(c: dict) -> str:
+        # display_text is built from name and id, so matching those two covers it
+        return f"{c['name'].lower()}\0{c['id'].lower()}"
+
     def search(self, contacts: list[dict], query: str) -> list[dict]:
         q = query.lower().strip()
-        filtered = [
-            c for c in contacts
-            if q in c["name"].lower()
-            or q in c["id"].lower()
-            or q in c["display_text"].lower()
-        ]
-
-        def relevance(c: dict) -> int:
-            if c["name"].lower() == q or c["id"].lower() == q:
-                return 0
-            if c["name"].lower().startswith(q) or c["id"].lower().startswith(q):
-                return 1
-            return 2
-
-        filtered.sort(key=relevance)
-        return filtered[:20]
+        indexed, haystack = self._indexed
+        if contacts is not indexed:
+            haystack = [self._search_key(c) for c in contacts]
+        matches = [i for i, key in enumerate(haystack) if q in key]
+
+        def relevance(i: int) -> tuple[int, int]:
+            name, cid = haystack[i].split("\0", 1)
+            if name == q or cid == q:
+                return 0, i
+            if name.startswith(q) or cid.startswith(q):
+                return 1, i
+            return 2, i
+
+        # Ties keep the alphabetical order of the contact list
+        return [contacts[i] for i in heapq.nsmallest(20, matches, key=relevance)]
 
 
 # Module-level singleton so cache persists across requests
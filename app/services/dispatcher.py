@@ -0,0 +1,427 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import httpx
+
+from pydantic import ValidationError
+
+from core.event_log import event_log
+from schemas.route import DeliveryPolicy, RateLimit
+from services.lanes import WeightedLanes
+from services.tracing import trace_store
+from services.replies import reply_sender, RETRYABLE_STATUSES
+from services.media_cache import media_cache
+from services.enrichment import enricher
+from services.rate_limit import (
+    Limiter, LimiterRegistry, DeliveryStats,
+    ready, acquire_all, queue_for, wait_and_acquire, strictest_policy,
+)
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 5.0
+# Fire-and-forget calls that may be open at once, on top of the workers
+DEFAULT_MAX_FIRE_AND_FORGET = 256
+RETRY_BACKOFF = 0.5
+MAX_RETRY_DELAY = 30.0
+LAG_PROBE_INTERVAL = 0.5
+# Consecutive failed deliveries before a webhook is reported as failing
+FAILING_AFTER = 5
+# Per-URL settings under ``webhooks:``, validated like their route-level counterparts
+WEBHOOK_SETTINGS = {"rate_limit": RateLimit, "delivery": DeliveryPolicy}
+
+
+def _valid_webhooks(webhooks: dict | None) -> dict:
+    """
+    The ``webhooks:`` config block with every setting validated.
+
+    Settings that fail validation are logged and skipped; the rest of the
+    URL's settings still apply. Only the keys that were set are kept, so a
+    per-URL policy overrides just those keys of the route's.
+    """
+    valid = {}
+    for url, settings in (webhooks or {}).items():
+        if not isinstance(settings, dict):
+            event_log.log("error", "❌ Ignoring webhooks.{url}: expected a mapping", url=url)
+            continue
+        valid[url] = dict(settings)
+        for name, model in WEBHOOK_SETTINGS.items():
+            if settings.get(name) is None:
+                continue
+            try:
+                valid[url][name] = model.model_validate(settings[name]).model_dump(exclude_unset=True)
+            except ValidationError as e:
+                del valid[url][name]
+                errors = "; ".join(f"{'.'.join(map(str, err['loc'])) or name}: {err['msg']}" for err in e.errors())
+                event_log.log("error", "❌ Ignoring webhooks.{url}.{name}: {errors}", url=url, name=name, errors=errors)
+    return valid
+
+
+@dataclass
+class Delivery:
+    chat_id: str
+    url: str
+    payload: dict
+    limiters: list[Limiter] = field(default_factory=list)
+    lane: str = "normal"
+    trace: dict | None = None
+    reply: bool = False
+    enrichment: dict | None = None
+    policy: dict = field(default_factory=dict)   # route delivery policy, overridden per URL
+    attempt: int = 0
+    media: dict | None = None   # shared by the deliveries of one message; holds its prefetch task
+
+
+class Dispatcher:
+    """
+    Delivers notifications to webhooks from a dedicated event loop thread.
+
+    The bot thread only enqueues work via ``submit``; a fixed pool of workers
+    sharing one pooled ``httpx.AsyncClient`` does the HTTP calls. Deliveries
+    pass through per-route and per-URL limiters, then wait in the priority
+    lane of their route until a worker picks them up.
+
+    Each delivery carries a policy: a timeout, a number of retries, optional
+    hedging to a second URL, and a mode. In ``fire_and_forget`` mode the call
+    is detached from the worker, so slow webhooks don't hold worker slots.
+    Retries go back on the queue after a backoff. They keep their limiter
+    slots, but they don't hold a worker while they wait.
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: WeightedLanes | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._webhooks: dict = {}
+        self._workers = DEFAULT_WORKERS
+        self._timeout = DEFAULT_TIMEOUT
+        self._max_detached = DEFAULT_MAX_FIRE_AND_FORGET
+        self._detached: asyncio.Semaphore | None = None
+        self._lane_weights: dict[str, int] = {}
+        # (chat_id, url) -> newest delivery waiting under the coalesce policy
+        self._coalescing: dict[tuple[str, str], Delivery] = {}
+        # chat_id -> admitted deliveries waiting, in order, for a media prefetch ahead of them
+        self._prefetching: dict[str, deque[Delivery]] = {}
+        self._prefetches: set[asyncio.Task] = set()   # keeps running prefetch tasks referenced
+        self.limiters = LimiterRegistry()
+        self.stats = DeliveryStats()
+        self.in_flight = 0
+        self.loop_lag_ms = 0.0
+        self.probed_at = 0.0   # monotonic time of the last lag probe
+        self._thread: threading.Thread | None = None
+        # url -> consecutive transport errors or 5xx responses
+        self._failures: dict[str, int] = {}
+
+    def start(self, config: dict) -> None:
+        if self._loop is not None:
+            return
+        options = config.get("dispatcher") or {}
+        self._workers = options.get("workers", DEFAULT_WORKERS)
+        self._lane_weights = options.get("lane_weights") or {}
+        self._max_detached = options.get("max_fire_and_forget", DEFAULT_MAX_FIRE_AND_FORGET)
+        self.configure(config)
+
+        started = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            loop.run_until_complete(self._setup())
+            started.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="dispatcher", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def configure(self, config: dict) -> None:
+        """Pick up per-webhook and feature settings after a config (re)load."""
+        self._webhooks = _valid_webhooks(config.get("webhooks"))
+        self._timeout = float((config.get("dispatcher") or {}).get("timeout", DEFAULT_TIMEOUT))
+        trace_store.configure(config.get("tracing"))
+        reply_sender.configure(config)
+        media_cache.configure(config.get("media"))
+        enricher.configure(config.get("enrichment"))
+
+    def submit(
+        self, chat_id: str, target_urls: list[str], payload: dict,
+        route: dict | None = None, received_at: float | None = None,
+    ) -> None:
+        """
+        Thread-safe: schedule delivery of ``payload`` to every URL in ``target_urls``.
+
+        ``received_at`` is the wall-clock time the notification was polled, for tracing.
+        """
+        if self._loop is None:
+            raise RuntimeError("Dispatcher not started")
+        self._loop.call_soon_threadsafe(
+            self._admit, chat_id, list(target_urls), payload, route or {}, received_at or time.time()
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def failing_webhooks(self) -> dict[str, int]:
+        """Webhooks whose last ``FAILING_AFTER`` or more deliveries all failed."""
+        return {url: n for url, n in list(self._failures.items()) if n >= FAILING_AFTER}
+
+    def run(self, coro) -> concurrent.futures.Future:
+        """Thread-safe: run a coroutine on the dispatcher loop."""
+        if self._loop is None:
+            raise RuntimeError("Dispatcher not started")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def replay(self, chat_id: str, url: str, payload: dict, limiter: Limiter) -> None:
+        """
+        Queue a journaled notification for ``url`` once ``limiter`` allows it.
+
+        Replays go to the low lane and are marked ``replayed`` in the body. Their
+        limiter is separate from the route's, so they never use up its budget.
+        Call from the dispatcher loop; this waits for the limiter, which paces the caller.
+        """
+        await wait_and_acquire([limiter])
+        self._enqueue(Delivery(
+            chat_id, url, payload, [limiter], "low", trace_store.start(payload, time.time()),
+            enrichment={"replayed": True},
+        ))
+
+    def queue_depths(self) -> dict[str, int]:
+        return self._queue.depths() if self._queue is not None else {}
+
+    def runtime(self) -> dict:
+        return {
+            "lanes": self.queue_depths(),
+            "in_flight": self.in_flight,
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
+        }
+
+    async def _setup(self) -> None:
+        self._queue = WeightedLanes(self._lane_weights)
+        self._detached = asyncio.Semaphore(self._max_detached)
+        # Room for every worker and detached call, twice over for hedged calls
+        self._client = httpx.AsyncClient(
+            timeout=self._timeout,
+            limits=httpx.Limits(max_connections=2 * (self._workers + self._max_detached)),
+        )
+        reply_sender.start()
+        for _ in range(self._workers):
+            asyncio.create_task(self._worker())
+        self.probed_at = time.monotonic()
+        asyncio.create_task(self._probe_lag())
+
+    async def _probe_lag(self) -> None:
+        # How late a short sleep wakes up: a cheap measure of event loop saturation
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.loop_lag_ms = max(0.0, (self._loop.time() - started - LAG_PROBE_INTERVAL) * 1000)
+            self.probed_at = time.monotonic()
+
+    def _enqueue(self, job: Delivery) -> None:
+        if job.trace is not None:
+            job.trace.setdefault("enqueued", time.time())   # a retry keeps its first stamp
+        self._queue.put_nowait(job.lane, job)
+
+    def _ready(self, job: Delivery) -> None:
+        """Enqueue an admitted delivery, prefetching its media first if it has any."""
+        pending = self._prefetching.get(job.chat_id)
+        if pending is not None:
+            # Something earlier from this chat is still downloading; keep the chat in order
+            pending.append(job)
+        elif job.media is not None:
+            self._prefetching[job.chat_id] = deque([job])
+            task = asyncio.create_task(self._prefetch(job.chat_id))
+            self._prefetches.add(task)
+            task.add_done_callback(self._prefetches.discard)
+        else:
+            self._enqueue(job)
+
+    async def _prefetch(self, chat_id: str) -> None:
+        pending = self._prefetching[chat_id]
+        try:
+            while pending:
+                job = pending[0]
+                if job.media is not None:
+                    # Webhooks of one message share the download, even when admitted apart
+                    if "task" not in job.media:
+                        job.media["task"] = asyncio.ensure_future(media_cache.localize(job.payload))
+                    job.payload = await asyncio.shield(job.media["task"])
+                self._enqueue(pending.popleft())
+        finally:
+            del self._prefetching[chat_id]
+
+    def _admit(self, chat_id: str, target_urls: list[str], payload: dict, route: dict, received: float) -> None:
+        route_limiter = self.limiters.get(f"route:{chat_id}", route.get("rate_limit"))
+        route_policy = route.get("delivery") or {}
+        enrichment = enricher.fields(chat_id, payload, route) if enricher.enabled else None
+        media = {} if media_cache.wants(payload) else None
+        for url in target_urls:
+            webhook = self._webhooks.get(url) or {}
+            url_limiter = self.limiters.get(f"url:{url}", webhook.get("rate_limit"))
+            limiters = [l for l in (route_limiter, url_limiter) if l is not None]
+            job = Delivery(
+                chat_id, url, payload, limiters, route.get("priority", "normal"),
+                trace_store.start(payload, received), bool(route.get("reply")), enrichment,
+                {**route_policy, **(webhook.get("delivery") or {})}, media=media,
+            )
+            if ready(limiters):
+                acquire_all(limiters)
+                self._ready(job)
+            else:
+                self._admit_limited(job)
+
+    def _admit_limited(self, job: Delivery) -> None:
+        policy = strictest_policy(job.limiters)
+        if policy == "shed":
+            self.stats.record(job.chat_id, job.url, "shed")
+            event_log.routine(
+                "warning", "🚦 Rate limit: dropped message for {key}",
+                "🚦 Rate limit: dropped {count} messages for {key} in the last {interval}s", job.url,
+            )
+            return
+
+        key = (job.chat_id, job.url)
+        if policy == "coalesce":
+            if key in self._coalescing:
+                # A delivery for this chat/URL is already waiting; it will carry the newest payload.
+                self._coalescing[key] = job
+                self.stats.record(job.chat_id, job.url, "coalesced")
+                return
+            self._coalescing[key] = job
+
+        self.stats.record(job.chat_id, job.url, "delayed")
+        # Queued behind earlier deliveries on the same limiters, so they stay in arrival order
+        queue_for(job.limiters).add_done_callback(lambda _: self._admitted(job, policy, key))
+
+    def _admitted(self, job: Delivery, policy: str, key: tuple[str, str]) -> None:
+        if policy == "coalesce":
+            newest = self._coalescing.pop(key)
+            job.payload, job.trace, job.enrichment = newest.payload, newest.trace, newest.enrichment
+            job.media = newest.media
+        self._ready(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.trace is not None:
+                job.trace.setdefault("dispatched", time.time())
+            if job.policy.get("mode") == "fire_and_forget":
+                await self._detached.acquire()
+                asyncio.create_task(self._deliver(job, detached=True))
+            else:
+                await self._deliver(job)
+
+    async def _deliver(self, job: Delivery, detached: bool = False) -> None:
+        """Make one attempt, then either schedule a retry or release the job's limiters."""
+        retry_in = None
+        self.in_flight += 1
+        try:
+            retry_in = await self._post(job)
+        except Exception as e:
+            event_log.log("error", "❌ Dispatcher error for {url}: {error}", url=job.url, error=e)
+        finally:
+            self.in_flight -= 1
+            if detached:
+                self._detached.release()
+        if retry_in is not None:
+            job.attempt += 1
+            self._loop.call_later(retry_in, self._enqueue, job)
+            return
+        for l in job.limiters:
+            l.release()
+
+    async def _post(self, job: Delivery) -> float | None:
+        """Deliver once. Returns the delay before a retry, or None once the delivery is settled."""
+        status = error = response = None
+        url = job.url
+        try:
+            body = {"chatId": job.chat_id, **(job.enrichment or {}), "payload": job.payload}
+            response, url = await self._send(job, body)
+            status = response.status_code
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        if error is not None or status >= 500:
+            self._failures[job.url] = self._failures.get(job.url, 0) + 1
+        else:
+            self._failures.pop(job.url, None)
+        # Other 4xx answers are the workflow's own doing and still count as forwarded
+        retryable = error is not None or status in RETRYABLE_STATUSES or status >= 500
+
+        if retryable and job.attempt < job.policy.get("retries", 0):
+            self.stats.record(job.chat_id, job.url, "retried")
+            retry_after = response.headers.get("retry-after", "") if response is not None else ""
+            delay = max(RETRY_BACKOFF * 2 ** job.attempt, float(retry_after) if retry_after.isdigit() else 0.0)
+            return min(delay, MAX_RETRY_DELAY)
+
+        try:
+            if not retryable:
+                self.stats.record(job.chat_id, job.url, "forwarded")
+                event_log.routine(
+                    "success", "✅ Forwarded to {key}",
+                    "✅ Forwarded {count} messages to {key} in the last {interval}s", url,
+                )
+                if job.reply and response.is_success:
+                    reply_sender.submit_response(job.chat_id, job.payload, response)
+            elif error is None:
+                self.stats.record(job.chat_id, job.url, "failed")
+                event_log.log("error", "❌ {url} answered HTTP {status}", url=url, status=status)
+            else:
+                self.stats.record(job.chat_id, job.url, "failed")
+                event_log.log("error", "❌ Error forwarding to {url}: {error}", url=job.url, error=error)
+        finally:
+            if job.trace is not None:
+                trace_store.finish(job.trace, job.chat_id, job.url, job.payload.get("idMessage"), status, error)
+        return None
+
+    async def _send(self, job: Delivery, body: dict) -> tuple[httpx.Response, str]:
+        """
+        POST ``body`` under the job's timeout; returns the response and the URL that gave it.
+
+        With hedging, a second call to ``hedge_url`` starts if the first has not
+        answered within ``hedge_after_ms``. The first successful response wins
+        and the other call is cancelled.
+        """
+        timeout = job.policy.get("timeout") or self._timeout
+        hedge_url = job.policy.get("hedge_url")
+        hedge_after_ms = job.policy.get("hedge_after_ms")
+        if not hedge_url or not hedge_after_ms or hedge_url == job.url:
+            return await self._client.post(job.url, json=body, timeout=timeout), job.url
+
+        def call(url: str) -> asyncio.Task:
+            return asyncio.ensure_future(self._client.post(url, json=body, timeout=timeout))
+
+        pending: dict[asyncio.Task, str] = {}
+        hedge_in = hedge_after_ms / 1000
+        last: tuple[httpx.Response, str] | BaseException | None = None
+        try:
+            pending[call(job.url)] = job.url
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=hedge_in, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    pending[call(hedge_url)] = hedge_url
+                    hedge_in = None
+                    self.stats.record(job.chat_id, job.url, "hedged")
+                    continue
+                for task in done:
+                    url = pending.pop(task)
+                    if task.exception() is not None:
+                        last = task.exception()
+                    elif task.result().is_success:
+                        return task.result(), url
+                    else:
+                        last = (task.result(), url)
+        finally:
+            for task in pending:
+                task.cancel()
+        if isinstance(last, BaseException):
+            raise last
+        return last
+
+
+# Module-level singleton shared by the bot thread and the API
+dispatcher = Dispatcher()
@@ -0,0 +1,39 @@
+from services.contacts_service import contacts_service
+
+DEFAULT_REFRESH_INTERVAL = 300  # seconds
+
+
+class Enricher:
+    """
+    Adds route and contact names to forwarded bodies so workflows need not call Green API.
+
+    Names come from the route config and from ``ContactsService``'s in-memory
+    chatId index, which a background thread refreshes. A lookup is a dict read,
+    so enrichment never waits on the network. Unknown names are sent as null.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+
+    def configure(self, options: dict | None) -> None:
+        options = options or {}
+        self.enabled = bool(options.get("enabled", False))
+        interval = float(options.get("refresh_interval", DEFAULT_REFRESH_INTERVAL))
+        contacts_service.set_refresh_interval(interval if self.enabled else 0)
+
+    def fields(self, chat_id: str, payload: dict, route: dict) -> dict:
+        contact = contacts_service.lookup(chat_id)
+        is_group = chat_id.endswith("@g.us")
+        fields = {
+            "routeName": route.get("name") or chat_id,
+            "contactName": contact["name"] if contact else None,
+            "chatType": "group" if is_group else "user",
+        }
+        if is_group:
+            sender = contacts_service.lookup((payload.get("senderData") or {}).get("sender") or "")
+            fields["senderContactName"] = sender["name"] if sender else None
+        return fields
+
+
+# Module-level singleton used by the dispatcher
+enricher = Enricher()
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+from core.config import settings
+from core.event_log import event_log
+from services.dispatcher import dispatcher
+
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_REPLAY_RATE = 5.0
+DEFAULT_REPLAY_IN_FLIGHT = 2
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 500
+PAGE_SIZE = 500
+COMPACT_INTERVAL = 3600
+MAX_FINISHED_JOBS = 20
+# One SQLite database per UTC day
+PARTITION_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.db$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    received_at REAL NOT NULL,
+    chat_id TEXT NOT NULL,
+    payload BLOB NOT NULL  -- zlib-compressed JSON
+);
+CREATE INDEX IF NOT EXISTS notifications_time ON notifications (received_at);
+CREATE INDEX IF NOT EXISTS notifications_chat ON notifications (chat_id, received_at);
+"""
+
+
+def _day(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def _where(start: float, end: float, chat_ids: list[str]) -> tuple[str, list]:
+    clause = "received_at >= ? AND received_at < ?"
+    params: list = [start, end]
+    if chat_ids:
+        clause += f" AND chat_id IN ({', '.join('?' * len(chat_ids))})"
+        params += chat_ids
+    return clause, params
+
+
+def _read_only(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+@dataclass
+class ReplayJob:
+    id: str
+    target_url: str
+    start: float
+    end: float
+    chat_ids: list[str]
+    created_at: float = field(default_factory=time.time)
+    total: int = 0
+    sent: int = 0
+    state: str = "running"   # running, done, cancelled, failed
+    error: str | None = None
+
+
+class DeliveryJournal:
+    """
+    Append-only journal of received notifications, so they can be replayed later.
+
+    The bot thread only puts notifications on a bounded queue. A writer thread
+    stores them in batches, as zlib-compressed JSON, in one SQLite database per
+    UTC day. Retention drops whole days, so compaction is a file deletion
+    rather than a DELETE and VACUUM.
+
+    A replay reads a time range back page by page and hands each notification
+    to the dispatcher. Every replay shares one ``replay`` limiter and waits in
+    the low lane, so replays cannot take the capacity live traffic needs.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+        self._enabled = False
+        self._dir = ""
+        self._retention_days = float(DEFAULT_RETENTION_DAYS)
+        self._replay_limit = {"rate": DEFAULT_REPLAY_RATE, "max_in_flight": DEFAULT_REPLAY_IN_FLIGHT}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()   # guards _jobs
+        self._jobs: dict[str, ReplayJob] = {}
+        self.stats: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def configure(self, options: dict | None) -> None:
+        options = options or {}
+        self._enabled = bool(options.get("enabled", False))
+        self._dir = options.get("dir") or os.path.join(os.path.dirname(settings.config_path) or ".", "journal")
+        self._retention_days = float(options.get("retention_days", DEFAULT_RETENTION_DAYS))
+        self._replay_limit = {
+            "rate": float(options.get("replay_rate") or DEFAULT_REPLAY_RATE),
+            "max_in_flight": int(options.get("replay_max_in_flight") or DEFAULT_REPLAY_IN_FLIGHT),
+        }
+        if self._enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._write_forever, name="journal-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, chat_id: str, payload: dict, received_at: float) -> None:
+        """Journal one notification. Only enqueues, so it is cheap on the bot thread."""
+        if not self._enabled:
+            return
+        try:
+            self._queue.put_nowait((received_at, chat_id, payload))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            event_log.routine(
+                "warning", "📒 Journal queue full: dropped a notification from {key}",
+                "📒 Journal queue full: dropped {count} notifications from {key} in the last {interval}s", chat_id,
+            )
+
+    def count(self, start: float, end: float, chat_ids: list[str]) -> int:
+        """How many journaled notifications fall in [start, end) for ``chat_ids`` (all chats if empty)."""
+        clause, params = _where(start, end, chat_ids)
+        total = 0
+        for path in self._partitions_between(start, end):
+            with closing(_read_only(path)) as db:
+                total += db.execute(f"SELECT COUNT(*) FROM notifications WHERE {clause}", params).fetchone()[0]
+        return total
+
+    def start_replay(self, start: float, end: float, chat_ids: list[str], target_url: str) -> ReplayJob:
+        job = ReplayJob(uuid.uuid4().hex[:12], target_url, start, end, list(chat_ids))
+        job.total = self.count(start, end, chat_ids)
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if j.state != "running"]
+            for old in finished[:-MAX_FINISHED_JOBS]:
+                del self._jobs[old.id]
+        event_log.log("info", "⏪ Replaying {total} notifications to {url}", total=job.total, url=target_url)
+        dispatcher.run(self._replay(job))
+        return job
+
+    def job(self, job_id: str) -> ReplayJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[ReplayJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> ReplayJob | None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.state == "running":
+            job.state = "cancelled"
+        return job
+
+    def snapshot(self) -> dict:
+        partitions = []
+        for day, path in self._partitions():
+            size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+            partitions.append({"day": day, "size_mb": round(size / 2**20, 2)})
+        return {
+            "enabled": self._enabled,
+            "retention_days": self._retention_days,
+            "queued": self._queue.qsize(),
+            **self.stats,
+            "partitions": partitions,
+        }
+
+    async def _replay(self, job: ReplayJob) -> None:
+        limiter = dispatcher.limiters.get("replay", self._replay_limit)
+        try:
+            for path in self._partitions_between(job.start, job.end):
+                after = 0
+                while job.state == "running":
+                    rows = await asyncio.to_thread(self._page, path, job, after)
+                    if not rows:
+                        break
+                    for _, chat_id, blob in rows:
+                        if job.state != "running":
+                            break
+                        await dispatcher.replay(chat_id, job.target_url, json.loads(zlib.decompress(blob)), limiter)
+                        job.sent += 1
+                    after = rows[-1][0]
+        except Exception as e:
+            job.state, job.error = "failed", str(e) or type(e).__name__
+            event_log.log("error", "❌ Replay {id} failed: {error}", id=job.id, error=job.error)
+            return
+        if job.state == "running":
+            job.state = "done"
+        event_log.log(
+            "info", "⏪ Replay {id} {state}: {sent} of {total} notifications queued for {url}",
+            id=job.id, state=job.state, sent=job.sent, total=job.total, url=job.target_url,
+        )
+
+    def _page(self, path: str, job: ReplayJob, after: int) -> list[tuple]:
+        clause, params = _where(job.start, job.end, job.chat_ids)
+        with closing(_read_only(path)) as db:
+            return db.execute(
+                f"SELECT id, chat_id, payload FROM notifications WHERE id > ? AND {clause} ORDER BY id LIMIT ?",
+                [after, *params, PAGE_SIZE],
+            ).fetchall()
+
+    def _partitions(self) -> list[tuple[str, str]]:
+        """(day, path) of every partition, oldest first."""
+        if not os.path.isdir(self._dir):
+            return []
+        days = sorted(m.group(1) for m in map(PARTITION_RE.match, os.listdir(self._dir)) if m)
+        return [(day, os.path.join(self._dir, f"{day}.db")) for day in days]
+
+    def _partitions_between(self, start: float, end: float) -> list[str]:
+        first, last = _day(start), _day(end)
+        return [path for day, path in self._partitions() if first <= day <= last]
+
+    def _write_forever(self) -> None:
+        connections: dict[str, sqlite3.Connection] = {}   # path -> connection, newest last
+        next_compaction = 0.0
+        while True:
+            try:
+                batch = [self._queue.get(timeout=COMPACT_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch, connections)
+                except Exception as e:
+                    self.stats["failed"] += len(batch)
+                    event_log.log(
+                        "error", "❌ Failed to journal {count} notifications: {error}", count=len(batch), error=e,
+                    )
+            if time.monotonic() >= next_compaction:
+                next_compaction = time.monotonic() + COMPACT_INTERVAL
+                self._compact(connections)
+
+    def _write(self, batch: list[tuple], connections: dict[str, sqlite3.Connection]) -> None:
+        rows = defaultdict(list)
+        for received_at, chat_id, payload in batch:
+            blob = zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode())
+            rows[os.path.join(self._dir, f"{_day(received_at)}.db")].append((received_at, chat_id, blob))
+        for path, partition_rows in rows.items():
+            db = connections.get(path) or self._open(path, connections)
+            with db:
+                db.executemany(
+                    "INSERT INTO notifications (received_at, chat_id, payload) VALUES (?, ?, ?)", partition_rows,
+                )
+        self.stats["written"] += len(batch)
+
+    def _open(self, path: str, connections: dict[str, sqlite3.Connection]) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = sqlite3.connect(path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        connections[path] = db
+        # Writes only ever go to today's partition, plus yesterday's around midnight
+        while len(connections) > 2:
+            connections.pop(next(iter(connections))).close()
+        return db
+
+    def _compact(self, connections: dict[str, sqlite3.Connection]) -> None:
+        cutoff = _day(time.time() - self._retention_days * 86400)
+        for day, path in self._partitions():
+            if day >= cutoff:
+                break
+            db = connections.pop(path, None)
+            if db is not None:
+                db.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            logger.info(f"🧹 Journal: dropped partition {day} (older than {self._retention_days:g} days)")
+
+
+# Module-level singleton, fed by the bot thread and read by the API
+journal = DeliveryJournal()
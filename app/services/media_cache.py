@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import httpx
+from loguru import logger
+
+from core.config import settings
+
+MEDIA_TYPES = ("imageMessage", "audioMessage", "videoMessage", "documentMessage", "stickerMessage")
+DEFAULT_MAX_SIZE_MB = 512
+DEFAULT_MAX_FILE_MB = 64
+DEFAULT_DOWNLOADS = 4
+CHUNK_SIZE = 64 * 1024
+# <sha256 hex>[.<ext>]
+NAME_RE = re.compile(r"^[0-9a-f]{64}(\.[A-Za-z0-9]{1,10})?$")
+
+
+def _extension(file_data: dict) -> str:
+    ext = os.path.splitext(file_data.get("fileName") or "")[1].lower()
+    if not ext or not NAME_RE.match("0" * 64 + ext):
+        ext = mimetypes.guess_extension((file_data.get("mimeType") or "").split(";")[0].strip()) or ""
+    return ext
+
+
+class MediaCache:
+    """
+    On-disk, content-addressed cache for media in incoming messages.
+
+    Each file is downloaded from Green API once, hashed while it streams to disk,
+    and stored as ``<sha256><ext>``, so identical files share one entry. The
+    payload's ``downloadUrl`` is then rewritten to the router's own
+    ``/api/v1/media`` endpoint, and every webhook of the route reads the local
+    copy. Once the cache grows past ``max_size_mb``, the least recently used
+    files are evicted.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] = OrderedDict()   # name -> size, oldest first
+        self._size = 0
+        self._dir = ""
+        self._enabled = False
+        self._public_url = ""
+        self._types: frozenset = frozenset(MEDIA_TYPES)
+        self._max_size = DEFAULT_MAX_SIZE_MB * 2**20
+        self._max_file = DEFAULT_MAX_FILE_MB * 2**20
+        # original URL -> download in progress (dispatcher loop only)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._downloads: asyncio.Semaphore | None = None
+
+    def configure(self, options: dict | None) -> None:
+        options = options or {}
+        self._public_url = (options.get("public_url") or "").strip().rstrip("/")
+        self._enabled = bool(options.get("enabled", False))
+        if self._enabled and not self._public_url:
+            logger.warning("⚠️ media.enabled needs media.public_url (how n8n reaches the router); prefetch is off")
+            self._enabled = False
+        self._types = frozenset(options.get("types") or MEDIA_TYPES)
+        self._max_size = float(options.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 2**20
+        self._max_file = float(options.get("max_file_mb", DEFAULT_MAX_FILE_MB)) * 2**20
+        directory = options.get("dir") or os.path.join(os.path.dirname(settings.config_path) or ".", "media")
+        if self._enabled and directory != self._dir:
+            self._dir = directory
+            self._load_index()
+        if self._enabled:
+            self._evict()
+
+    def wants(self, payload: dict) -> bool:
+        if not self._enabled:
+            return False
+        data = payload.get("messageData") or {}
+        return data.get("typeMessage") in self._types and bool((data.get("fileMessageData") or {}).get("downloadUrl"))
+
+    async def localize(self, payload: dict) -> dict:
+        """
+        Return ``payload`` with its download URL pointing at the local copy.
+
+        Concurrent calls for the same URL share one download. On any failure the
+        original payload is returned unchanged, so delivery never depends on the cache.
+        Call from the dispatcher loop.
+        """
+        data = payload["messageData"]
+        file_data = data["fileMessageData"]
+        url = file_data["downloadUrl"]
+        future = self._pending.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._download(url, _extension(file_data)))
+            self._pending[url] = future
+            future.add_done_callback(lambda _: self._pending.pop(url, None))
+        try:
+            name = await asyncio.shield(future)
+        except Exception as e:
+            logger.warning(f"⚠️ Media prefetch failed, webhooks will use the Green API URL: {e}")
+            return payload
+        local = {**file_data, "downloadUrl": f"{self._public_url}/api/v1/media/{name}", "originalDownloadUrl": url}
+        return {**payload, "messageData": {**data, "fileMessageData": local}}
+
+    def path(self, name: str) -> str | None:
+        """Path of a cached file, marking it recently used, or None."""
+        if not NAME_RE.match(name):
+            return None
+        with self._lock:
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self._dir, name)
+        try:
+            os.utime(path)   # so the LRU order survives a restart
+        except FileNotFoundError:
+            return None
+        return path
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"enabled": self._enabled, "files": len(self._index), "size_mb": round(self._size / 2**20, 2),
+                    "max_size_mb": round(self._max_size / 2**20, 2)}
+
+    async def _download(self, url: str, ext: str) -> str:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=60.0), follow_redirects=True)
+            self._downloads = asyncio.Semaphore(DEFAULT_DOWNLOADS)
+        os.makedirs(self._dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with self._downloads, self._client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self._max_file:
+                            raise ValueError(f"file is larger than {self._max_file / 2**20:g} MB")
+                        digest.update(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+            name = digest.hexdigest() + ext
+            os.replace(tmp, os.path.join(self._dir, name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            if name in self._index:
+                self._index.move_to_end(name)
+            else:
+                self._index[name] = size
+                self._size += size
+        self._evict()
+        return name
+
+    def _load_index(self) -> None:
+        entries = []
+        if os.path.isdir(self._dir):
+            for entry in os.scandir(self._dir):
+                if entry.name.endswith(".part"):
+                    os.remove(entry.path)   # left over from an interrupted download
+                elif NAME_RE.match(entry.name):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        with self._lock:
+            self._index = OrderedDict((name, size) for _, name, size in sorted(entries))
+            self._size = sum(self._index.values())
+
+    def _evict(self) -> None:
+        removed = []
+        with self._lock:
+            while self._size > self._max_size and self._index:
+                name, size = self._index.popitem(last=False)
+                self._size -= size
+                removed.append(name)
+        for name in removed:
+            try:
+                os.remove(os.path.join(self._dir, name))
+            except FileNotFoundError:
+                pass
+
+
+# Module-level singleton shared by the dispatcher and the API
+media_cache = MediaCache()
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Callable
+
+from whatsapp_chatbot_python import GreenAPIBot
+
+from core.event_log import event_log
+
+DEFAULT_MAX_POLL_LAG = 60.0
+DEFAULT_CHECK_INTERVAL = 5.0
+ERROR_BACKOFF = 5.0
+# Backlog notifications dropped at startup before giving up, so steady traffic can't stall it
+MAX_STARTUP_DRAIN = 1000
+
+
+class Poller(GreenAPIBot):
+    """
+    ``GreenAPIBot`` whose receive loop can be stopped and reports its progress.
+
+    ``last_poll`` is when ``receiveNotification`` last answered 200, whether or
+    not a notification came with it. Green API holds each poll open for a few
+    seconds at most, so a healthy poller updates it continuously.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.started_at = time.time()
+        self.last_poll: float | None = None
+        self.last_error: str | None = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> threading.Thread:
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self.run_forever, name="green-api-poller", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Ask the receive loop to exit once its current poll returns."""
+        self._stopped.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def lag(self) -> float:
+        """Seconds since the last successful poll, or since start if there was none."""
+        return time.time() - (self.last_poll or self.started_at)
+
+    def _delete_notifications_at_startup(self) -> None:
+        receiving = self.api.receiving
+        for _ in range(MAX_STARTUP_DRAIN):
+            response = receiving.receiveNotification()
+            if not response.data:
+                return
+            receiving.deleteNotification(response.data["receiptId"])
+        event_log.log(
+            "warning", "📡 Stopped dropping the backlog after {count} notifications; the rest will be delivered",
+            count=MAX_STARTUP_DRAIN,
+        )
+
+    def run_forever(self) -> None:
+        receiving = self.api.receiving
+        self.api.session.headers["Connection"] = "keep-alive"
+        while not self._stopped.is_set():
+            try:
+                response = receiving.receiveNotification()
+                if response.code != 200:
+                    raise RuntimeError(response.error or "no response")
+                self.last_poll = time.time()
+                if self.last_error is not None:
+                    event_log.log("info", "📡 Green API polling recovered")
+                    self.last_error = None
+                # A stopped poller leaves the notification for its replacement
+                if not response.data or self._stopped.is_set():
+                    continue
+                self.router.route_event(response.data["body"])
+                receiving.deleteNotification(response.data["receiptId"])
+            except Exception as e:
+                if self.last_error is None:
+                    event_log.log(
+                        "warning", "📡 Green API poll failed, retrying every {backoff:g}s: {error}",
+                        backoff=ERROR_BACKOFF, error=e,
+                    )
+                self.last_error = str(e) or type(e).__name__
+                self._stopped.wait(ERROR_BACKOFF)
+        self.api.session.headers["Connection"] = "close"
+
+
+class PollWatchdog:
+    """
+    Restarts the Green API poller when its thread dies or polls stop succeeding.
+
+    The running poller is registered with ``watch``. A background thread checks
+    it every ``interval`` seconds and calls ``restart`` when there has been no
+    successful poll for ``max_poll_lag`` seconds. Restarts are at least
+    ``max_poll_lag`` apart, so a Green API outage doesn't become a restart loop.
+    """
+
+    def __init__(self) -> None:
+        self.poller: Poller | None = None
+        self.expected = False   # credentials are configured, so a poller should be running
+        self.restarts = 0
+        self._enabled = True
+        self._max_lag = DEFAULT_MAX_POLL_LAG
+        self._interval = DEFAULT_CHECK_INTERVAL
+        self._last_restart = 0.0
+        self._restart: Callable[[], None] | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def max_lag(self) -> float:
+        return self._max_lag
+
+    def configure(self, options: dict | None) -> None:
+        options = options or {}
+        self._enabled = bool(options.get("enabled", True))
+        self._max_lag = float(options.get("max_poll_lag", DEFAULT_MAX_POLL_LAG))
+        self._interval = float(options.get("interval", DEFAULT_CHECK_INTERVAL))
+
+    def start(self, restart: Callable[[], None]) -> None:
+        self._restart = restart
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="poll-watchdog", daemon=True)
+            self._thread.start()
+
+    def watch(self, poller: Poller | None, expected: bool) -> None:
+        self.poller = poller
+        self.expected = expected
+
+    def problem(self) -> str | None:
+        """Why polling is unhealthy, or None if it is fine."""
+        if not self.expected:
+            return "Green API credentials are not configured"
+        poller = self.poller
+        if poller is None:
+            return "poller failed to start"
+        if not poller.alive:
+            return "poller thread has exited"
+        lag = poller.lag()
+        if lag > self._max_lag:
+            reason = f"no successful poll for {lag:.0f}s"
+            return f"{reason} ({poller.last_error})" if poller.last_error else reason
+        return None
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            if not self._enabled or not self.expected or time.time() - self._last_restart < self._max_lag:
+                continue
+            problem = self.problem()
+            if problem is None:
+                continue
+            self._last_restart = time.time()
+            self.restarts += 1
+            event_log.log("warning", "🐕 Watchdog: {problem}; restarting the poller", problem=problem)
+            try:
+                self._restart()
+            except Exception as e:
+                event_log.log("error", "❌ Watchdog failed to restart the poller: {error}", error=e)
+
+
+# Module-level singleton, fed by the bot lifecycle in app.py
+poll_watchdog = PollWatchdog()
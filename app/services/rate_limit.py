@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+# Ordered from most to least forgiving; when a route and a webhook URL both
+# limit a delivery, the strictest of their policies wins.
+POLICIES = ("delay", "coalesce", "shed")
+OUTCOMES = ("forwarded", "failed", "delayed", "coalesced", "shed", "filtered", "retried", "hedged")
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second and stores at most ``burst`` of them."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+
+class Waiter:
+    """A delivery queued on one or more limiters; ``future`` resolves once all of them are acquired."""
+
+    __slots__ = ("limiters", "future")
+
+    def __init__(self, limiters: list["Limiter"], future: asyncio.Future) -> None:
+        self.limiters = limiters
+        self.future = future
+
+
+class Limiter:
+    """
+    Token bucket plus max-in-flight cap for a single route or webhook URL.
+
+    Deliveries that have to wait queue up in arrival order, and only the head
+    of the queue is ever woken: by ``release`` when it needs a slot, or by one
+    timer per limiter when it needs a token. A waiter on two limiters (route
+    and URL) is granted when it heads both queues. Both queues are filled in
+    arrival order, so the oldest waiter always heads all of its queues and
+    they cannot deadlock.
+
+    Only ever touched from the dispatcher event loop, so no locking is needed.
+    """
+
+    def __init__(self, spec: dict) -> None:
+        self.spec = spec
+        rate = spec.get("rate")
+        self.bucket = TokenBucket(rate, spec.get("burst") or max(1, int(rate))) if rate else None
+        self.max_in_flight = spec.get("max_in_flight")
+        self.policy = spec.get("policy", "delay")
+        self.in_flight = 0
+        self.waiters: deque[Waiter] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def has_slot(self) -> bool:
+        return self.max_in_flight is None or self.in_flight < self.max_in_flight
+
+    def token_wait(self) -> float:
+        return self.bucket.wait_time() if self.bucket else 0.0
+
+    def acquire(self) -> None:
+        if self.bucket:
+            self.bucket.take()
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.grant()
+
+    def grant(self) -> None:
+        """Hand tokens and slots to the waiters at the head of the queue, in order."""
+        while self.waiters:
+            waiter = self.waiters[0]
+            if waiter.future.done():   # cancelled
+                self.waiters.popleft()
+                continue
+            if any(l.waiters[0] is not waiter for l in waiter.limiters):
+                return   # still queued behind others on another limiter, which grants it in turn
+            if not all(l.has_slot() for l in waiter.limiters):
+                return   # the release of a slot grants again
+            blocking = [(l.token_wait(), l) for l in waiter.limiters]
+            wait, limiter = max(blocking, key=lambda b: b[0])
+            if wait > 0:
+                limiter._wake_in(wait)
+                return
+            acquire_all(waiter.limiters)
+            for l in waiter.limiters:
+                l.waiters.popleft()
+            waiter.future.set_result(None)
+            for l in waiter.limiters:
+                if l is not self:
+                    l.grant()
+
+    def _wake_in(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self.grant()
+
+
+def ready(limiters: list[Limiter]) -> bool:
+    """True if a new delivery may go now: nobody is queued ahead of it and tokens and slots are free."""
+    return all(not l.waiters and l.has_slot() and l.token_wait() == 0 for l in limiters)
+
+
+def acquire_all(limiters: list[Limiter]) -> None:
+    for l in limiters:
+        l.acquire()
+
+
+def queue_for(limiters: list[Limiter]) -> asyncio.Future:
+    """Join the back of every limiter's queue; the future resolves once their tokens and slots are taken."""
+    waiter = Waiter(limiters, asyncio.get_running_loop().create_future())
+    for l in limiters:
+        l.waiters.append(waiter)
+    limiters[0].grant()
+    return waiter.future
+
+
+async def wait_and_acquire(limiters: list[Limiter]) -> None:
+    """Block until every limiter has both a token and a free slot, in arrival order, then take them."""
+    if ready(limiters):
+        acquire_all(limiters)
+        return
+    future = queue_for(limiters)
+    try:
+        await future
+    except asyncio.CancelledError:
+        if future.done() and not future.cancelled():
+            for l in limiters:
+                l.release()   # granted just as we were cancelled; hand it on
+        else:
+            for l in limiters:
+                l.grant()   # drop the cancelled waiter if it was at the head
+        raise
+
+
+def strictest_policy(limiters: list[Limiter]) -> str:
+    return max((l.policy for l in limiters), key=POLICIES.index, default="delay")
+
+
+class LimiterRegistry:
+    """Keeps one limiter per key and rebuilds it when its configuration changes."""
+
+    def __init__(self) -> None:
+        self._limiters: dict[str, Limiter] = {}
+
+    def get(self, key: str, spec: dict | None) -> Limiter | None:
+        if not spec or not (spec.get("rate") or spec.get("max_in_flight")):
+            self._limiters.pop(key, None)
+            return None
+        limiter = self._limiters.get(key)
+        if limiter is None or limiter.spec != spec:
+            limiter = Limiter(spec)
+            self._limiters[key] = limiter
+        return limiter
+
+
+class DeliveryStats:
+    """Outcome counters per route and per webhook URL, readable from any thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, Counter] = defaultdict(Counter)
+        self._webhooks: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, chat_id: str, url: str, outcome: str) -> None:
+        with self._lock:
+            self._routes[chat_id][outcome] += 1
+            self._webhooks[url][outcome] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "routes": {k: dict(v) for k, v in self._routes.items()},
+                "webhooks": {k: dict(v) for k, v in self._webhooks.items()},
+            }
@@ -0,0 +1,195 @@
+import asyncio
+from collections import Counter, deque
+from dataclasses import dataclass
+
+import httpx
+
+from core.event_log import event_log
+from services.rate_limit import LimiterRegistry, wait_and_acquire
+
+DEFAULT_API_URL = "https://api.green-api.com"
+# Well under Green API's per-instance request limits; it answers 429 when exceeded
+DEFAULT_LIMIT = {"rate": 5, "burst": 10, "max_in_flight": 4}
+DEFAULT_RETRIES = 3
+DEFAULT_QUEUE_SIZE = 1000
+RETRY_BACKOFF = 1.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Reply:
+    chat_id: str
+    message: str
+    quoted_message_id: str | None = None
+    attempt: int = 0
+
+
+def parse_replies(body, chat_id: str, id_message: str | None) -> list[Reply]:
+    """
+    Replies requested by a webhook response body.
+
+    ``{"reply": "text"}``, ``{"reply": {"message": "text", "quote": true}}`` or a
+    list of either under ``reply``. ``quote`` quotes the incoming message.
+    """
+    if not isinstance(body, dict) or "reply" not in body:
+        return []
+    items = body["reply"] if isinstance(body["reply"], list) else [body["reply"]]
+    replies = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"message": item}
+        if not isinstance(item, dict) or not isinstance(item.get("message"), str) or not item["message"]:
+            continue
+        quoted = id_message if item.get("quote") else None
+        replies.append(Reply(chat_id, item["message"], quoted))
+    return replies
+
+
+class ReplySender:
+    """
+    Sends replies from webhook responses back to WhatsApp via Green API ``sendMessage``.
+
+    Runs on the dispatcher's event loop with its own pooled ``httpx.AsyncClient``.
+    Each chat has its own queue, and its replies are sent one after another, so
+    they arrive in the order the webhook gave them. Different chats are sent
+    concurrently over the shared keep-alive connections, within one token bucket
+    and in-flight cap. Throttled (429) and server-error responses are retried with
+    exponential backoff, honouring ``Retry-After``. Later replies to the same chat
+    wait for the retry.
+    """
+
+    def __init__(self) -> None:
+        self._chats: dict[str, deque[Reply]] = {}   # chat_id -> replies waiting, oldest first
+        self._queued = 0
+        self._drains: set[asyncio.Task] = set()   # keeps running drain tasks referenced
+        self._client: httpx.AsyncClient | None = None
+        self._limiters = LimiterRegistry()
+        self._limit = DEFAULT_LIMIT
+        self._credentials = ("", "", DEFAULT_API_URL)
+        self._retries = DEFAULT_RETRIES
+        self._queue_size = DEFAULT_QUEUE_SIZE
+        self.stats: Counter = Counter()
+
+    def configure(self, config: dict) -> None:
+        ga = config.get("green_api") or {}
+        self._credentials = (
+            str(ga.get("instance_id") or "").strip(),
+            str(ga.get("token") or "").strip(),
+            (ga.get("api_url") or DEFAULT_API_URL).strip().rstrip("/"),
+        )
+        options = config.get("replies") or {}
+        self._limit = {
+            "rate": options.get("rate", DEFAULT_LIMIT["rate"]),
+            "burst": options.get("burst", DEFAULT_LIMIT["burst"]),
+            "max_in_flight": options.get("max_in_flight", DEFAULT_LIMIT["max_in_flight"]),
+        }
+        self._retries = int(options.get("retries", DEFAULT_RETRIES))
+        self._queue_size = int(options.get("queue_size", DEFAULT_QUEUE_SIZE))
+
+    def start(self) -> None:
+        """Create the client; call from the dispatcher loop."""
+        self._client = httpx.AsyncClient(timeout=10.0)
+
+    def submit_response(self, chat_id: str, payload: dict, response: httpx.Response) -> None:
+        """Queue any replies in a webhook response. Call from the dispatcher loop."""
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            return
+        for reply in parse_replies(body, chat_id, payload.get("idMessage")):
+            self._enqueue(reply)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "queued": self._queued}
+
+    def _enqueue(self, reply: Reply) -> None:
+        if self._queued >= self._queue_size:
+            self.stats["dropped"] += 1
+            event_log.routine(
+                "warning", "📭 Reply queue full: dropped reply to {key}",
+                "📭 Reply queue full: dropped {count} replies to {key} in the last {interval}s", reply.chat_id,
+            )
+            return
+        self._queued += 1
+        pending = self._chats.get(reply.chat_id)
+        if pending is None:
+            pending = self._chats[reply.chat_id] = deque()
+            task = asyncio.create_task(self._drain(reply.chat_id, pending))
+            self._drains.add(task)
+            task.add_done_callback(self._drains.discard)
+        pending.append(reply)
+
+    async def _drain(self, chat_id: str, pending: deque[Reply]) -> None:
+        """Send one chat's replies in order; ends when its queue is empty."""
+        try:
+            while pending:
+                limiter = self._limiters.get("green_api", self._limit)
+                if limiter is not None:
+                    await wait_and_acquire([limiter])
+                retry_in = await self._send(pending[0], limiter)
+                if retry_in is not None:
+                    await asyncio.sleep(retry_in)
+                    continue
+                pending.popleft()
+                self._queued -= 1
+        except Exception as e:
+            self.stats["failed"] += len(pending)
+            event_log.log(
+                "error", "❌ Dropped {count} replies to {chat_id}: {error}",
+                count=len(pending), chat_id=chat_id, error=e,
+            )
+        finally:
+            self._queued -= len(pending)
+            del self._chats[chat_id]
+
+    async def _send(self, reply: Reply, limiter) -> float | None:
+        """Send one reply; returns the delay before retrying it, or None once it is settled."""
+        try:
+            error, retryable, retry_after = await self._post(reply)
+        finally:
+            if limiter is not None:
+                limiter.release()
+        if error is None:
+            self.stats["sent"] += 1
+            event_log.routine(
+                "success", "💬 Sent reply to {key}",
+                "💬 Sent {count} replies to {key} in the last {interval}s", reply.chat_id,
+            )
+        elif retryable and reply.attempt < self._retries:
+            delay = max(RETRY_BACKOFF * 2 ** reply.attempt, retry_after)
+            reply.attempt += 1
+            self.stats["retried"] += 1
+            return delay
+        else:
+            self.stats["failed"] += 1
+            event_log.log("error", "❌ Failed to send reply to {chat_id}: {error}", chat_id=reply.chat_id, error=error)
+        return None
+
+    async def _post(self, reply: Reply) -> tuple[str | None, bool, float]:
+        """Call ``sendMessage``; returns (error or None, retryable, Retry-After seconds)."""
+        instance_id, token, api_url = self._credentials
+        if not instance_id or not token:
+            return "Green API credentials are not configured", False, 0.0
+        body = {"chatId": reply.chat_id, "message": reply.message}
+        if reply.quoted_message_id:
+            body["quotedMessageId"] = reply.quoted_message_id
+        try:
+            response = await self._client.post(f"{api_url}/waInstance{instance_id}/sendMessage/{token}", json=body)
+        except (httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+            return f"invalid green_api.api_url: {e}", False, 0.0
+        except Exception as e:
+            return str(e) or type(e).__name__, True, 0.0
+        if response.is_success:
+            return None, False, 0.0
+        retry_after = response.headers.get("retry-after", "")
+        return (
+            f"HTTP {response.status_code}",
+            response.status_code in RETRYABLE_STATUSES,
+            float(retry_after) if retry_after.isdigit() else 0.0,
+        )
+
+
+# Module-level singleton, driven by the dispatcher
+reply_sender = ReplySender()
@@ -1,5 +1,4 @@
-import yaml
-from config_loader import load_config
+from config_loader import config_lock, load_config, save_config
 from core.config import settings
 
 
@@ -13,42 +12,89 @@ class RouteService:
     def exists(self, chat_id: str) -> bool:
         return chat_id in self.get_all()
 
-    def create(self, chat_id: str, name: str, target_urls: list[str]) -> None:
-        config = load_config(settings.config_path)
-        config["routes"][chat_id] = {"name": name, "target_urls": target_urls}
-        self._save(config)
-
-    def update(self, chat_id: str, target_urls: list[str], name: str | None = None) -> None:
-        config = load_config(settings.config_path)
-        existing = config["routes"].get(chat_id, {})
-        if isinstance(existing, dict):
-            existing_name = existing.get("name", chat_id)
-        else:
-            existing_name = chat_id
-        config["routes"][chat_id] = {
-            "name": name if name else existing_name,
-            "target_urls": target_urls,
-        }
-        self._save(config)
+    def create(self, chat_id: str, name: str, target_urls: list[str], options: dict | None = None) -> None:
+        with config_lock:
+            config = load_config(settings.config_path)
+            if chat_id in config["routes"]:
+                raise ValueError(f"Route '{chat_id}' already exists")
+            config["routes"][chat_id] = {"name": name, "target_urls": target_urls, **(options or {})}
+            self._save(config)
+
+    def update(
+        self, chat_id: str, target_urls: list[str], name: str | None = None, options: dict | None = None
+    ) -> None:
+        with config_lock:
+            config = load_config(settings.config_path)
+            if chat_id not in config.get("routes", {}):
+                raise KeyError(f"Route '{chat_id}' not found")
+            existing = config["routes"][chat_id]
+            if isinstance(existing, dict):
+                existing_name = existing.get("name", chat_id)
+            else:
+                existing_name = chat_id
+            config["routes"][chat_id] = {
+                "name": name if name else existing_name,
+                "target_urls": target_urls,
+                **(options or {}),
+            }
+            self._save(config)
 
     def rename(self, chat_id: str, name: str) -> None:
-        config = load_config(settings.config_path)
-        route = config["routes"][chat_id]
-        if isinstance(route, dict):
-            config["routes"][chat_id]["name"] = name
-        elif isinstance(route, list):
-            config["routes"][chat_id] = {"name": name, "target_urls": route}
-        else:
-            config["routes"][chat_id] = {"name": name, "target_urls": [route]}
-        self._save(config)
+        with config_lock:
+            config = load_config(settings.config_path)
+            if chat_id not in config.get("routes", {}):
+                raise KeyError(f"Route '{chat_id}' not found")
+            route = config["routes"][chat_id]
+            if isinstance(route, dict):
+                config["routes"][chat_id]["name"] = name
+            elif isinstance(route, list):
+                config["routes"][chat_id] = {"name": name, "target_urls": route}
+            else:
+                config["routes"][chat_id] = {"name": name, "target_urls": [route]}
+            self._save(config)
 
     def delete(self, chat_id: str) -> None:
-        config = load_config(settings.config_path)
-        if chat_id not in config.get("routes", {}):
-            raise KeyError(f"Route '{chat_id}' not found")
-        del config["routes"][chat_id]
-        self._save(config)
+        with config_lock:
+            config = load_config(settings.config_path)
+            if chat_id not in config.get("routes", {}):
+                raise KeyError(f"Route '{chat_id}' not found")
+            del config["routes"][chat_id]
+            self._save(config)
+
+    def bulk_upsert(self, changes: dict[str, dict], dry_run: bool = False) -> dict[str, int]:
+        """
+        Create or update many routes with one read and one atomic write.
+
+        ``changes`` maps chat_id -> fields to set. Fields that are left out keep
+        their current value. A ``None`` value removes an optional setting. Returns
+        how many routes were (or, with ``dry_run``, would be) created, updated and
+        left unchanged, and under ``incomplete`` the new routes that came without
+        ``target_urls``. If there are any, nothing is written.
+        """
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        incomplete = []
+        with config_lock:
+            config = load_config(settings.config_path)
+            routes = config.setdefault("routes", {})
+            for chat_id, fields in changes.items():
+                existing = routes.get(chat_id)
+                if existing is None and not fields.get("target_urls"):
+                    incomplete.append(chat_id)
+                    continue
+                route = dict(existing) if isinstance(existing, dict) else {"name": chat_id}
+                for key, value in fields.items():
+                    if value is not None:
+                        route[key] = value
+                    elif key != "name":
+                        route.pop(key, None)
+                if route == existing:
+                    counts["unchanged"] += 1
+                    continue
+                counts["created" if existing is None else "updated"] += 1
+                routes[chat_id] = route
+            if not dry_run and not incomplete and (counts["created"] or counts["updated"]):
+                self._save(config)
+        return {**counts, "incomplete": incomplete}
 
     def _save(self, config: dict) -> None:
-        with open(settings.config_path, "w") as f:
-            yaml.dump(config, f)
+        save_config(config, settings.config_path)
@@ -0,0 +1,129 @@
+import re
+import threading
+
+from loguru import logger
+
+# messageData sub-objects that carry the text of a message, in lookup order
+_TEXT_FIELDS = (
+    ("textMessageData", "textMessage"),
+    ("extendedTextMessageData", "text"),
+    ("fileMessageData", "caption"),
+    ("editedMessageData", "textMessage"),
+)
+
+
+def message_text(event: dict) -> str:
+    """The text or caption of a Green API message notification, or ``""``."""
+    data = event.get("messageData") or {}
+    for section, field in _TEXT_FIELDS:
+        value = (data.get(section) or {}).get(field)
+        if value:
+            return value
+    return ""
+
+
+def keyword_pattern(keywords: list[str]) -> re.Pattern:
+    """
+    Compile a keyword list into one regex shaped like a trie.
+
+    Keywords sharing a prefix share a branch, so ``re`` tests all of them in a
+    single pass over the text instead of trying each keyword in turn. Keywords
+    (which may be phrases) only match whole words.
+    """
+    trie: dict = {}
+    for word in keywords:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if end else group
+
+    return re.compile(r"(?<!\w)" + build(trie) + r"(?!\w)")
+
+
+class RouteRules:
+    """
+    Content rules for one route, compiled once from its ``rules`` config.
+
+    A message passes when every configured condition holds: its type is in
+    ``message_types``, its group sender is in ``senders``, and its text contains
+    one of ``keywords`` as a whole word or phrase, or matches one of ``patterns``. Conditions that are not
+    configured are skipped.
+    """
+
+    def __init__(self, spec: dict) -> None:
+        self.spec = spec
+        self.case_sensitive = case_sensitive = bool(spec.get("case_sensitive", False))
+        self.message_types = frozenset(spec.get("message_types") or ())
+        self.senders = frozenset(spec.get("senders") or ())
+        keywords = [k if case_sensitive else k.lower() for k in spec.get("keywords") or () if k]
+        self.keywords = keyword_pattern(keywords) if keywords else None
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self.patterns = []
+        for pattern in spec.get("patterns") or ():
+            try:
+                self.patterns.append(re.compile(pattern, flags))
+            except re.error as e:
+                # The API validates patterns; this only catches hand-edited config
+                logger.error(f"❌ Ignoring invalid rule pattern {pattern!r}: {e}")
+
+    def matches(self, event: dict) -> bool:
+        if self.message_types and (event.get("messageData") or {}).get("typeMessage") not in self.message_types:
+            return False
+        if self.senders and (event.get("senderData") or {}).get("sender") not in self.senders:
+            return False
+        if self.keywords is None and not self.patterns:
+            return True
+        text = message_text(event)
+        # Lowering the text once is much cheaper than a case-insensitive trie
+        if self.keywords is not None and self.keywords.search(text if self.case_sensitive else text.lower()):
+            return True
+        return any(p.search(text) for p in self.patterns)
+
+
+class RulesRegistry:
+    """
+    Compiled rules per chat ID.
+
+    Rules are compiled when the config is (re)loaded. A route whose ``rules``
+    object was replaced since then (a newer config) is recompiled on first use,
+    so a message is never checked against stale rules.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._compiled: dict[str, RouteRules] = {}
+
+    def configure(self, routes: dict | None) -> None:
+        compiled = {}
+        for chat_id, route in (routes or {}).items():
+            spec = route.get("rules") if isinstance(route, dict) else None
+            if spec:
+                compiled[chat_id] = RouteRules(spec)
+        with self._lock:
+            self._compiled = compiled
+
+    def allows(self, chat_id: str, route: dict, event: dict) -> bool:
+        """True if ``event`` passes the route's rules (or the route has none)."""
+        spec = route.get("rules")
+        if not spec:
+            return True
+        rules = self._compiled.get(chat_id)
+        if rules is None or rules.spec is not spec:
+            rules = RouteRules(spec)
+            with self._lock:
+                self._compiled[chat_id] = rules
+        return rules.matches(event)
+
+
+# Module-level singleton used by the bot thread
+route_rules = RulesRegistry()
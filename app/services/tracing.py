@@ -0,0 +1,174 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+from loguru import logger
+
+DEFAULT_CAPACITY = 1000
+
+# stage name -> (start stamp, end stamp)
+STAGES = {
+    "green_api": ("whatsapp", "received"),
+    "admission": ("received", "enqueued"),
+    "queue": ("enqueued", "dispatched"),
+    "webhook": ("dispatched", "responded"),
+    "total": ("received", "responded"),
+}
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class SpanExporter:
+    """
+    Appends finished traces to a file as OpenTelemetry-style JSON spans.
+
+    Each line is one span: a ``deliver`` root span for the delivery plus one
+    child span per stage. Writing happens on a background thread so the
+    dispatcher never waits on disk.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        threading.Thread(target=self._write_forever, name="span-exporter", daemon=True).start()
+
+    def export(self, trace: dict) -> None:
+        self._queue.put(trace)
+
+    def _write_forever(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            while True:
+                trace = self._queue.get()
+                try:
+                    for span in self._spans(trace):
+                        f.write(json.dumps(span) + "\n")
+                    if self._queue.empty():
+                        f.flush()
+                except Exception as e:
+                    logger.error(f"Failed to export trace: {e}")
+
+    @staticmethod
+    def _spans(trace: dict) -> list[dict]:
+        trace_id = os.urandom(16).hex()
+        root_id = os.urandom(8).hex()
+        stamps = trace["stamps"]
+        attributes = {
+            "messaging.message.id": trace["id_message"],
+            "whatsapp.chat_id": trace["chat_id"],
+            "url.full": trace["url"],
+            "http.response.status_code": trace["status"],
+        }
+        spans = [{
+            "traceId": trace_id,
+            "spanId": root_id,
+            "name": "deliver",
+            "startTimeUnixNano": int(stamps["received"] * 1e9),
+            "endTimeUnixNano": int(stamps["responded"] * 1e9),
+            "status": {"code": "ERROR" if trace["error"] else "OK", "message": trace["error"] or ""},
+            "attributes": attributes,
+        }]
+        for stage, (start, end) in STAGES.items():
+            if stage == "total" or stamps.get(start) is None or stamps.get(end) is None:
+                continue
+            spans.append({
+                "traceId": trace_id,
+                "spanId": os.urandom(8).hex(),
+                "parentSpanId": root_id,
+                "name": stage,
+                "startTimeUnixNano": int(stamps[start] * 1e9),
+                "endTimeUnixNano": int(stamps[end] * 1e9),
+            })
+        return spans
+
+
+class TraceStore:
+    """
+    Bounded in-memory store of per-delivery latency traces.
+
+    A trace carries wall-clock stamps taken at each stage between the
+    WhatsApp message timestamp and the webhook response. Once the delivery
+    finishes, the stamps are turned into per-stage durations in milliseconds.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._traces: deque = deque(maxlen=DEFAULT_CAPACITY)
+        self._enabled = True
+        self._sample_rate = 1.0
+        self._exporter: SpanExporter | None = None
+
+    def configure(self, options: dict | None) -> None:
+        options = options or {}
+        self._enabled = options.get("enabled", True)
+        self._sample_rate = float(options.get("sample_rate", 1.0))
+        capacity = int(options.get("capacity", DEFAULT_CAPACITY))
+        if capacity != self._traces.maxlen:
+            with self._lock:
+                self._traces = deque(self._traces, maxlen=capacity)
+        path = options.get("export_path")
+        if not path:
+            self._exporter = None
+        elif self._exporter is None or self._exporter.path != path:
+            self._exporter = SpanExporter(path)
+
+    def start(self, payload: dict, received: float) -> dict | None:
+        """Begin a trace for one notification, or return None if not sampled."""
+        if not self._enabled or (self._sample_rate < 1 and random.random() >= self._sample_rate):
+            return None
+        return {"whatsapp": payload.get("timestamp"), "received": received}
+
+    def finish(self, stamps: dict, chat_id: str, url: str, id_message: str | None,
+               status: int | None, error: str | None) -> None:
+        stamps["responded"] = time.time()
+        stages = {}
+        for stage, (start, end) in STAGES.items():
+            if stamps.get(start) is not None and stamps.get(end) is not None:
+                stages[stage] = round((stamps[end] - stamps[start]) * 1000, 3)
+        trace = {
+            "id_message": id_message,
+            "chat_id": chat_id,
+            "url": url,
+            "status": status,
+            "error": error,
+            "stamps": stamps,
+            "stages_ms": stages,
+        }
+        with self._lock:
+            self._traces.append(trace)
+        if self._exporter is not None:
+            self._exporter.export(trace)
+
+    def recent(self, limit: int = 100, chat_id: str | None = None) -> list[dict]:
+        with self._lock:
+            traces = list(self._traces)
+        if chat_id:
+            traces = [t for t in traces if t["chat_id"] == chat_id]
+        return traces[-limit:][::-1]
+
+    def summary(self) -> dict:
+        with self._lock:
+            traces = list(self._traces)
+        result = {}
+        for stage in STAGES:
+            values = sorted(t["stages_ms"][stage] for t in traces if stage in t["stages_ms"])
+            if values:
+                result[stage] = {
+                    "count": len(values),
+                    "p50": _percentile(values, 50),
+                    "p95": _percentile(values, 95),
+                    "p99": _percentile(values, 99),
+                    "max": values[-1],
+                }
+        return result
+
+
+# Module-level singleton shared by the dispatcher and the API
+trace_store = TraceStore()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports its packages flat (``from services.x import y``), as app.py does when run from app/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
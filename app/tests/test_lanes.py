@@ -0,0 +1,54 @@
+import asyncio
+from collections import Counter
+
+from services.lanes import WeightedLanes
+
+
+def drain(lanes: WeightedLanes, count: int) -> list:
+    async def main():
+        return [await lanes.get() for _ in range(count)]
+
+    return asyncio.run(main())
+
+
+def test_lanes_are_served_by_weight():
+    lanes = WeightedLanes()
+    for lane in ("high", "normal", "low"):
+        for i in range(120):
+            lanes.put_nowait(lane, (lane, i))
+    served = Counter(lane for lane, _ in drain(lanes, 120))
+    assert served == {"high": 80, "normal": 30, "low": 10}
+
+
+def test_each_lane_is_fifo():
+    lanes = WeightedLanes()
+    for i in range(20):
+        lanes.put_nowait("high" if i % 2 else "low", i)
+    items = drain(lanes, 20)
+    assert [i for i in items if i % 2] == list(range(1, 20, 2))
+    assert [i for i in items if not i % 2] == list(range(0, 20, 2))
+
+
+def test_low_lane_is_not_starved():
+    lanes = WeightedLanes({"high": 100, "low": 1})
+    lanes.put_nowait("low", "low")
+    for i in range(500):
+        lanes.put_nowait("high", i)
+    assert "low" in drain(lanes, 102)
+
+
+def test_empty_lanes_do_not_bank_turns():
+    lanes = WeightedLanes()
+    for i in range(10):
+        lanes.put_nowait("low", i)
+    drain(lanes, 10)
+    for i in range(4):
+        lanes.put_nowait("high", ("high", i))
+        lanes.put_nowait("low", ("low", i))
+    assert [lane for lane, _ in drain(lanes, 2)] == ["high", "high"]
+
+
+def test_unknown_lane_falls_back_to_normal():
+    lanes = WeightedLanes()
+    lanes.put_nowait("urgent", "x")
+    assert lanes.depths()["normal"] == 1
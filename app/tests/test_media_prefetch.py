@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from services.dispatcher import Dispatcher
+from services.lanes import WeightedLanes
+from services.media_cache import media_cache
+
+
+def message(text: str, media: bool = False) -> dict:
+    if media:
+        data = {"typeMessage": "imageMessage", "fileMessageData": {"downloadUrl": f"https://green/{text}"}}
+    else:
+        data = {"typeMessage": "textMessage", "textMessageData": {"textMessage": text}}
+    return {"messageData": data, "id": text}
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    downloads = []
+
+    async def localize(payload: dict) -> dict:
+        downloads.append(payload["id"])
+        await asyncio.sleep(0.01)
+        return {**payload, "localized": True}
+
+    monkeypatch.setattr(media_cache, "wants", lambda payload: "fileMessageData" in payload["messageData"])
+    monkeypatch.setattr(media_cache, "localize", localize)
+    return downloads
+
+
+async def delivered(dispatcher: Dispatcher, count: int) -> list[tuple[str, str, bool]]:
+    jobs = [await asyncio.wait_for(dispatcher._queue.get(), 1) for _ in range(count)]
+    return [(job.url, job.payload["id"], job.payload.get("localized", False)) for job in jobs]
+
+
+def test_media_is_fetched_once_and_keeps_its_place_in_the_chat(downloads):
+    async def scenario():
+        dispatcher = Dispatcher()
+        dispatcher._queue = WeightedLanes()
+        urls = ["https://n8n/a", "https://n8n/b"]
+        dispatcher._admit("1@c.us", urls, message("photo", media=True), {}, 0.0)
+        dispatcher._admit("1@c.us", urls, message("caption"), {}, 0.0)
+        dispatcher._admit("2@c.us", urls[:1], message("other"), {}, 0.0)
+        return await delivered(dispatcher, 5)
+
+    assert asyncio.run(scenario()) == [
+        ("https://n8n/a", "other", False),
+        ("https://n8n/a", "photo", True),
+        ("https://n8n/b", "photo", True),
+        ("https://n8n/a", "caption", False),
+        ("https://n8n/b", "caption", False),
+    ]
+    assert downloads == ["photo"]
+
+
+def test_shed_media_is_not_downloaded(downloads):
+    async def scenario():
+        dispatcher = Dispatcher()
+        dispatcher._queue = WeightedLanes()
+        route = {"rate_limit": {"rate": 1, "burst": 1, "policy": "shed"}}
+        dispatcher._admit("1@c.us", ["https://n8n/a"], message("first"), route, 0.0)
+        dispatcher._admit("1@c.us", ["https://n8n/a"], message("photo", media=True), route, 0.0)
+        return await delivered(dispatcher, 1)
+
+    assert asyncio.run(scenario()) == [("https://n8n/a", "first", False)]
+    assert downloads == []
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from services import rate_limit
+from services.rate_limit import Limiter, LimiterRegistry, TokenBucket, queue_for, ready, wait_and_acquire
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        assert bucket.wait_time() == 0
+        bucket.take()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now += 0.25
+    assert bucket.wait_time() == pytest.approx(0.25)
+    clock.now += 0.25
+    assert bucket.wait_time() == 0
+
+
+def test_bucket_never_holds_more_than_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    clock.now += 60
+    assert bucket.wait_time() == 0
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() == pytest.approx(0.1)
+
+
+def test_limiter_burst_defaults_to_rate():
+    assert Limiter({"rate": 5}).bucket.burst == 5
+    assert Limiter({"rate": 0.2}).bucket.burst == 1
+
+
+def test_registry_rebuilds_limiter_only_when_spec_changes():
+    registry = LimiterRegistry()
+    first = registry.get("url:a", {"rate": 1})
+    assert registry.get("url:a", {"rate": 1}) is first
+    assert registry.get("url:a", {"rate": 2}) is not first
+    assert registry.get("url:a", None) is None
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_delayed_waiters_are_granted_in_arrival_order():
+    async def main():
+        limiter = Limiter({"rate": 200, "burst": 1})
+        order = []
+        for i in range(16):
+            if ready([limiter]):
+                limiter.acquire()
+                order.append(i)
+            else:
+                queue_for([limiter]).add_done_callback(lambda _, i=i: order.append(i))
+        while len(order) < 16:
+            await asyncio.sleep(0.01)
+        return order
+
+    assert run(main()) == list(range(16))
+
+
+def test_new_arrival_does_not_skip_queued_waiters():
+    async def main():
+        limiter = Limiter({"max_in_flight": 1})
+        limiter.acquire()
+        first = queue_for([limiter])
+        limiter.release()   # the slot goes to the queued waiter, not to whoever asks next
+        assert first.done()
+        assert not ready([limiter])
+        second = asyncio.ensure_future(wait_and_acquire([limiter]))
+        await asyncio.sleep(0)
+        assert not second.done()
+        limiter.release()
+        await second
+        assert limiter.in_flight == 1
+
+    run(main())
+
+
+def test_release_wakes_only_the_head():
+    async def main():
+        limiter = Limiter({"max_in_flight": 1})
+        limiter.acquire()
+        futures = [queue_for([limiter]) for _ in range(1000)]
+        limiter.release()
+        assert [f.done() for f in futures[:2]] == [True, False]
+        assert len(limiter.waiters) == 999
+
+    run(main())
+
+
+def test_waiter_on_two_limiters_keeps_order_on_both():
+    async def main():
+        route = Limiter({"max_in_flight": 1})
+        url = Limiter({"max_in_flight": 1})
+        route.acquire()
+        order = []
+        queue_for([route, url]).add_done_callback(lambda _: order.append("both"))
+        queue_for([url]).add_done_callback(lambda _: order.append("url"))
+        await asyncio.sleep(0)
+        assert order == []   # the url-only waiter queued behind the one that needs the route slot
+        route.release()
+        await asyncio.sleep(0)
+        assert order == ["both"]
+        url.release()
+        await asyncio.sleep(0)
+        assert order == ["both", "url"]
+
+    run(main())
+
+
+def test_cancelled_waiter_is_skipped():
+    async def main():
+        limiter = Limiter({"max_in_flight": 1})
+        limiter.acquire()
+        cancelled = asyncio.ensure_future(wait_and_acquire([limiter]))
+        await asyncio.sleep(0)
+        after = queue_for([limiter])
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        limiter.release()
+        assert after.done()
+        assert limiter.in_flight == 1
+
+    run(main())
@@ -0,0 +1,15 @@
+from services.dispatcher import _valid_webhooks
+
+
+def test_valid_settings_are_normalised():
+    webhooks = _valid_webhooks({"https://n8n/a": {"rate_limit": {"rate": "5"}, "delivery": {"mode": "fire_and_forget"}}})
+    assert webhooks == {"https://n8n/a": {"rate_limit": {"rate": 5.0}, "delivery": {"mode": "fire_and_forget"}}}
+
+
+def test_invalid_settings_are_skipped_individually():
+    webhooks = _valid_webhooks({
+        "https://n8n/a": {"rate_limit": {"rate": "fast"}, "delivery": {"retries": 2}},
+        "https://n8n/b": {"delivery": {"hedge_url": "https://n8n/c"}},
+        "https://n8n/d": ["not", "a", "mapping"],
+    })
+    assert webhooks == {"https://n8n/a": {"delivery": {"retries": 2}}, "https://n8n/b": {}}
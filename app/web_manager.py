@@ -1,12 +1,12 @@
 from pathlib import Path
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 
 from api.v1.router import api_router
 from config_loader import ensure_config
 from core.config import settings
+from core.spa import SpaAssets
 
 ensure_config(settings.config_path)
 
@@ -15,31 +15,17 @@ app = FastAPI(title="Green API n8n Router", docs_url="/api/docs", redoc_url=None
 # Angular 18 builder emits into a browser/ subdirectory inside outputPath.
 # Use __file__ so the path is always relative to this module, regardless of CWD.
 _dist = Path(__file__).parent / "static" / "dist" / "browser"
-_dist_resolved = _dist.resolve()
-
-if _dist.is_dir():
-    if (_dist / "assets").is_dir():
-        app.mount("/assets", StaticFiles(directory=str(_dist / "assets")), name="assets")
+# Indexed (and precompressed if needed) once; the build does not change while running
+_spa = SpaAssets(_dist)
 
 app.include_router(api_router, prefix="/api/v1")
 
 
 @app.get("/{full_path:path}", include_in_schema=False, response_model=None)
-async def serve_spa(full_path: str) -> FileResponse | JSONResponse:
-    """Serve Angular SPA — path-traversal safe, API routes take precedence."""
-    # Resolve and contain: reject any path that escapes the dist directory
-    try:
-        candidate = (_dist / full_path).resolve()
-        candidate.relative_to(_dist_resolved)  # raises ValueError on escape
-    except (ValueError, OSError):
-        candidate = None
-
-    if candidate is not None and candidate.is_file():
-        return FileResponse(candidate)
-
-    index = _dist / "index.html"
-    if index.exists():
-        return FileResponse(index)
+async def serve_spa(full_path: str, request: Request) -> Response:
+    """Serve Angular SPA — only indexed build files, API routes take precedence."""
+    if _spa.built:
+        return _spa.response(full_path, request)
 
     return JSONResponse(
         {"message": "Angular app not built. Run: cd web && npm run build"},
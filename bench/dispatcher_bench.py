@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Dispatcher microbenchmark.
+
+Drives synthetic ``incomingMessageReceived`` notifications through
+``app.process_incoming_message`` and the real delivery path, against a local
+stand-in n8n server (bench/stand_in_n8n.py) running in a separate process.
+Each case is one combination of route-table size and webhook fan-out. For each
+case it reports messages per second, p50/p95/p99 end-to-end latency (from hand-off
+to the router until the webhook request arrives) and router CPU time per message.
+
+Results are written as JSON. Use ``--baseline`` to compare against an earlier run
+and exit non-zero on regressions:
+
+    python bench/dispatcher_bench.py --routes 10,1000,10000 --fanout 1,3 -o bench.json
+    python bench/dispatcher_bench.py --baseline bench.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from harness import ROOT, free_port, percentile, spawn_script
+
+sys.path.insert(0, str(ROOT / "app"))
+
+
+def start_stand_in(port: int, latency_ms: float, jitter_ms: float, error_rate: float):
+    return spawn_script("stand_in_n8n.py", [
+        "--port", str(port), "--latency-ms", str(latency_ms),
+        "--jitter-ms", str(jitter_ms), "--error-rate", str(error_rate),
+    ], f"http://127.0.0.1:{port}/_stats?latencies=0")
+
+
+def route_table(n_routes: int, fanout: int, base_url: str) -> dict:
+    return {
+        f"9725{i:08d}@c.us": {
+            "name": f"Bench route {i}",
+            "target_urls": [f"{base_url}/webhook/r{i}/w{j}" for j in range(fanout)],
+        }
+        for i in range(n_routes)
+    }
+
+
+def make_event(chat_id: str, seq: int) -> dict:
+    return {
+        "typeWebhook": "incomingMessageReceived",
+        "instanceData": {"idInstance": 1101000001, "wid": "972500000000@c.us", "typeInstance": "whatsapp"},
+        "timestamp": int(time.time()),
+        "idMessage": f"BENCH{seq:016X}",
+        "senderData": {"chatId": chat_id, "sender": chat_id, "senderName": "Bench", "chatName": "Bench"},
+        "messageData": {
+            "typeMessage": "textMessage",
+            "textMessageData": {"textMessage": f"benchmark message {seq}"},
+        },
+        "bench": {"seq": seq, "sent_ns": time.time_ns()},
+    }
+
+
+def run_case(router, stand_in_url: str, n_routes: int, fanout: int, args) -> dict:
+    from whatsapp_chatbot_python import Notification
+    from services.dispatcher import dispatcher
+
+    router.config = {"green_api": {"instance_id": "", "token": ""}, "routes": route_table(n_routes, fanout, stand_in_url)}
+    dispatcher.configure(router.config)
+    chat_ids = list(router.config["routes"])
+    rng = random.Random(n_routes * 31 + fanout)
+    expected = args.messages * fanout
+    httpx.post(f"{stand_in_url}/_reset")
+
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    for seq in range(args.messages):
+        if args.rate:
+            lag = started + seq / args.rate - time.perf_counter()
+            if lag > 0:
+                time.sleep(lag)
+        event = make_event(rng.choice(chat_ids), seq)
+        router.process_incoming_message(Notification(event, None, None))
+    submitted = time.perf_counter()
+
+    deadline = submitted + args.timeout
+    received = 0
+    while time.perf_counter() < deadline:
+        received = httpx.get(f"{stand_in_url}/_stats?latencies=0").json()["received"]
+        if received >= expected:
+            break
+        time.sleep(0.02)
+    finished = time.perf_counter()
+    cpu = time.process_time() - cpu_start
+    stats = httpx.get(f"{stand_in_url}/_stats").json()
+
+    elapsed = finished - started
+    latencies = stats["latencies_ms"]
+    return {
+        "routes": n_routes,
+        "fanout": fanout,
+        "messages": args.messages,
+        "deliveries_expected": expected,
+        "deliveries_received": stats["received"],
+        "webhook_errors": stats["errors"],
+        "timed_out": received < expected,
+        "elapsed_s": round(elapsed, 3),
+        "submit_s": round(submitted - started, 3),
+        "msgs_per_sec": round(args.messages / elapsed, 1),
+        "deliveries_per_sec": round(stats["received"] / elapsed, 1),
+        "latency_ms": {p: percentile(latencies, int(p[1:])) for p in ("p50", "p95", "p99")},
+        "cpu_us_per_msg": round(cpu / args.messages * 1e6, 1),
+    }
+
+
+# metric -> True if higher is better
+_COMPARED = {"msgs_per_sec": True, "cpu_us_per_msg": False, "p95_ms": False}
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    def metrics(r: dict) -> dict:
+        return {"msgs_per_sec": r["msgs_per_sec"], "cpu_us_per_msg": r["cpu_us_per_msg"],
+                "p95_ms": r["latency_ms"]["p95"]}
+
+    old = {(r["routes"], r["fanout"]): metrics(r) for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        before = old.get((r["routes"], r["fanout"]))
+        if not before:
+            continue
+        for name, value in metrics(r).items():
+            prev = before[name]
+            if prev is None or value is None:
+                continue
+            higher_is_better = _COMPARED[name]
+            worse = value < prev * (1 - tolerance) if higher_is_better else value > prev * (1 + tolerance)
+            if worse:
+                regressions.append(
+                    f"routes={r['routes']} fanout={r['fanout']}: {name} {prev} -> {value}"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default="10,1000,10000", help="comma-separated route table sizes")
+    parser.add_argument("--fanout", default="1,3", help="comma-separated webhooks per route")
+    parser.add_argument("--messages", type=int, default=2000, help="messages per case")
+    parser.add_argument("--rate", type=float, default=0, help="offered messages/s (0 = as fast as possible)")
+    parser.add_argument("--workers", type=int, default=8, help="dispatcher workers")
+    parser.add_argument("--latency-ms", type=float, default=5, help="stand-in webhook latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a case to drain")
+    parser.add_argument("--log-stderr", action="store_true", help="keep router log output on stderr")
+    parser.add_argument("--delivery-lines", default="all", choices=("all", "sample", "aggregate"),
+                        help="logging.delivery_lines mode for the run")
+    parser.add_argument("-o", "--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="router-bench-")
+    os.environ["ROUTER_CONFIG_PATH"] = os.path.join(workdir, "config.yaml")
+
+    from loguru import logger
+    import app as router
+    from core.event_log import event_log, setup_logging
+    from services.dispatcher import dispatcher
+
+    logging_options = {"level": "INFO", "delivery_lines": args.delivery_lines}
+    if args.log_stderr:
+        setup_logging(logging_options)
+    else:
+        # Same enqueued sink as production, with the output dropped
+        logger.remove()
+        logger.add(open(os.devnull, "w"), level="INFO", enqueue=True)
+    event_log.configure(logging_options)
+
+    port = free_port()
+    stand_in = start_stand_in(port, args.latency_ms, args.jitter_ms, args.error_rate)
+    stand_in_url = f"http://127.0.0.1:{port}"
+    dispatcher.start({"dispatcher": {"workers": args.workers}})
+
+    results = []
+    try:
+        for n_routes in (int(x) for x in args.routes.split(",")):
+            for fanout in (int(x) for x in args.fanout.split(",")):
+                result = run_case(router, stand_in_url, n_routes, fanout, args)
+                results.append(result)
+                print(
+                    f"routes={n_routes:>6} fanout={fanout} "
+                    f"{result['msgs_per_sec']:>9.1f} msg/s  "
+                    f"p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms "
+                    f"p99={result['latency_ms']['p99']}ms  cpu={result['cpu_us_per_msg']}us/msg"
+                    + ("  TIMED OUT" if result["timed_out"] else ""),
+                    file=sys.stderr,
+                )
+    finally:
+        stand_in.terminate()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version": os.environ.get("ROUTER_APP_VERSION", "dev"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
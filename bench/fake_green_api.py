@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Fake Green API server for soak tests.
+
+Implements the endpoints the router touches -- getSettings/setSettings (bot
+start-up), receiveNotification, deleteNotification, getContacts and
+sendMessage (replies) -- so the
+router can run unmodified with ``green_api.api_url`` pointed here. After
+POST /_start, it generates ``incomingMessageReceived`` notifications for a
+fixed set of chats at a steady rate. Counters are served at GET /_stats.
+
+    python bench/fake_green_api.py --port 8766 --rate 20 --chats 50 --contacts 5000
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import deque
+
+from aiohttp import web
+
+
+def chat_ids(count: int) -> list[str]:
+    return [f"9725{i:08d}@c.us" for i in range(count)]
+
+
+class FakeGreenAPI:
+    def __init__(self, rate: float, chats: int, contacts: int, receive_timeout: float) -> None:
+        self.rate = rate
+        self.chats = chat_ids(chats)
+        self.contacts = [
+            {"id": cid, "name": f"Contact {i}", "type": "user"}
+            for i, cid in enumerate(chat_ids(contacts))
+        ]
+        self.receive_timeout = receive_timeout
+        self.queue: deque = deque()
+        self.receipts = itertools.count(1)
+        self.available = asyncio.Event()
+        self.generator: asyncio.Task | None = None
+        self.counters = {"generated": 0, "received": 0, "deleted": 0, "polls": 0, "contacts_calls": 0,
+                         "sent": 0}
+
+    async def generate(self) -> None:
+        seq = 0
+        started = time.monotonic()
+        while True:
+            chat_id = self.chats[seq % len(self.chats)]
+            self.queue.append({
+                "receiptId": next(self.receipts),
+                "body": {
+                    "typeWebhook": "incomingMessageReceived",
+                    "instanceData": {"idInstance": 1101000001, "wid": "972500000000@c.us",
+                                     "typeInstance": "whatsapp"},
+                    "timestamp": int(time.time()),
+                    "idMessage": f"SOAK{seq:016X}",
+                    "senderData": {"chatId": chat_id, "sender": chat_id,
+                                   "senderName": "Soak", "chatName": "Soak"},
+                    "messageData": {"typeMessage": "textMessage",
+                                    "textMessageData": {"textMessage": f"soak message {seq}"}},
+                    "bench": {"seq": seq, "sent_ns": time.time_ns()},
+                },
+            })
+            self.counters["generated"] += 1
+            self.available.set()
+            seq += 1
+            await asyncio.sleep(max(0.0, started + seq / self.rate - time.monotonic()))
+
+    async def receive_notification(self, request: web.Request) -> web.Response:
+        self.counters["polls"] += 1
+        timeout = float(request.query.get("receiveTimeout", self.receive_timeout))
+        if not self.queue:
+            self.available.clear()
+            try:
+                await asyncio.wait_for(self.available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return web.json_response(None)
+        self.counters["received"] += 1
+        # Like the real API, the head of the queue is returned until it is deleted
+        return web.json_response(self.queue[0])
+
+    async def delete_notification(self, request: web.Request) -> web.Response:
+        receipt_id = int(request.match_info["receipt_id"])
+        if self.queue and self.queue[0]["receiptId"] == receipt_id:
+            self.queue.popleft()
+            self.counters["deleted"] += 1
+            return web.json_response({"result": True})
+        return web.json_response({"result": False})
+
+    async def get_settings(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "incomingWebhook": "yes",
+            "outgoingMessageWebhook": "yes",
+            "outgoingAPIMessageWebhook": "yes",
+        })
+
+    async def set_settings(self, request: web.Request) -> web.Response:
+        return web.json_response({"saveSettings": True})
+
+    async def get_contacts(self, request: web.Request) -> web.Response:
+        self.counters["contacts_calls"] += 1
+        return web.json_response(self.contacts)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("chatId") or not body.get("message"):
+            return web.json_response({"message": "chatId and message are required"}, status=400)
+        self.counters["sent"] += 1
+        return web.json_response({"idMessage": f"SENT{self.counters['sent']:016X}"})
+
+    async def start(self, request: web.Request) -> web.Response:
+        if self.generator is None:
+            self.generator = asyncio.create_task(self.generate())
+        return web.json_response({"message": "started"})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.counters, "backlog": len(self.queue)})
+
+
+def build_app(rate: float, chats: int, contacts: int, receive_timeout: float = 5) -> web.Application:
+    fake = FakeGreenAPI(rate, chats, contacts, receive_timeout)
+    app = web.Application()
+    base = "/waInstance{instance}"
+    app.router.add_get(base + "/receiveNotification/{token}", fake.receive_notification)
+    app.router.add_delete(base + "/deleteNotification/{token}/{receipt_id}", fake.delete_notification)
+    app.router.add_get(base + "/getSettings/{token}", fake.get_settings)
+    app.router.add_post(base + "/setSettings/{token}", fake.set_settings)
+    app.router.add_get(base + "/getContacts/{token}", fake.get_contacts)
+    app.router.add_post(base + "/sendMessage/{token}", fake.send_message)
+    app.router.add_post("/_start", fake.start)
+    app.router.add_get("/_stats", fake.stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--rate", type=float, default=10, help="notifications generated per second")
+    parser.add_argument("--chats", type=int, default=20, help="distinct chats messages come from")
+    parser.add_argument("--contacts", type=int, default=1000, help="size of the getContacts list")
+    parser.add_argument("--receive-timeout", type=float, default=5, help="long-poll wait when the queue is empty")
+    args = parser.parse_args()
+    web.run_app(
+        build_app(args.rate, args.chats, args.contacts, args.receive_timeout),
+        host=args.host, port=args.port, print=None, access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
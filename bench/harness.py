@@ -0,0 +1,46 @@
+"""Helpers shared by the benchmark, soak and load harnesses."""
+
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn(argv: list[str], ready_url: str, timeout: float = 30, **popen_kwargs) -> subprocess.Popen:
+    """Start ``argv`` and wait until ``ready_url`` answers (any status)."""
+    proc = subprocess.Popen(argv, **popen_kwargs)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{argv[1]} exited with code {proc.returncode}")
+        try:
+            httpx.get(ready_url, timeout=0.5)
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{argv[1]} did not become ready at {ready_url}")
+
+
+def spawn_script(name: str, args: list[str], ready_url: str, **popen_kwargs) -> subprocess.Popen:
+    return spawn([sys.executable, str(BENCH_DIR / name), *args], ready_url, **popen_kwargs)
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[rank], 3)
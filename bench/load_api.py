@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Load test for the management API.
+
+For each route-table size, this seeds a config and starts the router (app/app.py)
+with its Green API credentials pointed at bench/fake_green_api.py. The fake serves
+a contact list of the requested size. Concurrent clients then hammer the routes
+CRUD, settings and contact search endpoints. The script reports count, errors,
+throughput and p50/p95/p99 latency per endpoint.
+
+Every client creates, updates, renames and deletes only its own routes, so the
+final state is known. After the run, config.yaml is parsed and checked: it must
+still be valid YAML, every seeded route must be intact, and every client's last
+successful write must be present. Any corruption or lost update fails the run.
+
+    python bench/load_api.py --routes 100,1000,10000 --contacts 50000 --concurrency 16 --duration 30s
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import yaml
+
+from harness import ROOT, free_port, percentile, spawn, spawn_script
+from soak import parse_duration
+
+# endpoint label -> relative weight in the request mix
+MIX = {
+    "GET /routes": 20,
+    "GET /contacts/search": 30,
+    "POST /routes": 15,
+    "PUT /routes/{id}": 12,
+    "PUT /routes/{id}/name": 6,
+    "DELETE /routes/{id}": 7,
+    "GET /settings": 7,
+    "POST /settings": 3,
+}
+
+
+def seeded_routes(count: int) -> dict:
+    return {
+        f"9725{i:08d}@c.us": {"name": f"Seeded {i}", "target_urls": [f"https://n8n.example.com/webhook/seed{i}"]}
+        for i in range(count)
+    }
+
+
+class Client:
+    """One simulated API user that only writes routes it created itself."""
+
+    def __init__(self, index: int, http: httpx.AsyncClient, latencies: dict, errors: dict, contacts: int) -> None:
+        self.index = index
+        self.http = http
+        self.latencies = latencies
+        self.errors = errors
+        self.contacts = contacts
+        self.rng = random.Random(index)
+        self.created = 0
+        self.expected: dict[str, dict] = {}   # chat_id -> route as last written
+        self.deleted: set[str] = set()
+
+    async def call(self, label: str, method: str, path: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+    def own_route(self) -> str | None:
+        return self.rng.choice(list(self.expected)) if self.expected else None
+
+    async def step(self, label: str) -> None:
+        if label == "GET /routes":
+            await self.call(label, "GET", "/api/v1/routes")
+        elif label == "GET /contacts/search":
+            q = self.rng.choice([f"Contact {self.rng.randrange(self.contacts)}", f"{self.rng.randrange(1000):03d}"])
+            await self.call(label, "GET", "/api/v1/contacts/search", params={"q": q})
+        elif label == "GET /settings":
+            await self.call(label, "GET", "/api/v1/settings")
+        elif label == "POST /settings":
+            # Same credentials, so the watcher reloads routes without restarting the bot
+            await self.call(label, "POST", "/api/v1/settings",
+                            json={"instance_id": "1101000001", "token": "load-token"})
+        elif label == "POST /routes":
+            chat_id = f"load-{self.index}-{self.created}@c.us"
+            self.created += 1
+            route = {"name": f"Load {chat_id}", "target_urls": [f"https://n8n.example.com/webhook/{chat_id}"]}
+            if await self.call(label, "POST", "/api/v1/routes", json={"chat_id": chat_id, **route}):
+                self.expected[chat_id] = route
+        elif (chat_id := self.own_route()) is None:
+            return
+        elif label == "PUT /routes/{id}":
+            route = {"name": self.expected[chat_id]["name"],
+                     "target_urls": [f"https://n8n.example.com/webhook/{chat_id}/v{self.rng.randrange(10**6)}"]}
+            if await self.call(label, "PUT", f"/api/v1/routes/{chat_id}", json=route):
+                self.expected[chat_id] = route
+        elif label == "PUT /routes/{id}/name":
+            name = f"Renamed {self.rng.randrange(10**6)}"
+            if await self.call(label, "PUT", f"/api/v1/routes/{chat_id}/name", json={"name": name}):
+                self.expected[chat_id] = {**self.expected[chat_id], "name": name}
+        elif label == "DELETE /routes/{id}":
+            if await self.call(label, "DELETE", f"/api/v1/routes/{chat_id}"):
+                del self.expected[chat_id]
+                self.deleted.add(chat_id)
+
+    async def run(self, until: float) -> None:
+        labels, weights = list(MIX), list(MIX.values())
+        while time.monotonic() < until:
+            await self.step(self.rng.choices(labels, weights)[0])
+
+
+def verify(config_path: Path, seeded: dict, clients: list[Client]) -> list[str]:
+    try:
+        config = yaml.safe_load(config_path.read_text())
+        routes = config["routes"]
+    except Exception as e:
+        return [f"config.yaml is corrupt: {e}"]
+    problems = []
+    damaged = [cid for cid, route in seeded.items() if routes.get(cid) != route]
+    if damaged:
+        problems.append(f"{len(damaged)} seeded routes missing or changed, e.g. {damaged[0]}")
+    lost = [cid for c in clients for cid, route in c.expected.items()
+            if {k: routes.get(cid, {}).get(k) for k in route} != route]
+    if lost:
+        problems.append(f"{len(lost)} lost route writes, e.g. {lost[0]}")
+    resurrected = [cid for c in clients for cid in c.deleted if cid in routes]
+    if resurrected:
+        problems.append(f"{len(resurrected)} deleted routes came back, e.g. {resurrected[0]}")
+    if config.get("green_api", {}).get("token") != "load-token":
+        problems.append("green_api credentials were lost")
+    return problems
+
+
+async def hammer(base_url: str, concurrency: int, duration: float, contacts: int) -> tuple[list[Client], dict, dict, float]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as http:
+        clients = [Client(i, http, latencies, errors, contacts) for i in range(concurrency)]
+        started = time.monotonic()
+        await asyncio.gather(*(c.run(started + duration) for c in clients))
+        elapsed = time.monotonic() - started
+    return clients, latencies, errors, elapsed
+
+
+def run_case(n_routes: int, args, duration: float) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="router-load-"))
+    green_port, router_port = free_port(), free_port()
+    green_url = f"http://127.0.0.1:{green_port}"
+    router_url = f"http://127.0.0.1:{router_port}"
+    seeded = seeded_routes(n_routes)
+    config_path = workdir / "config" / "config.yaml"
+    config_path.parent.mkdir(parents=True)
+    config_path.write_text(yaml.safe_dump({
+        "green_api": {"instance_id": "1101000001", "token": "load-token", "api_url": green_url},
+        "routes": seeded,
+    }))
+
+    procs = []
+    try:
+        procs.append(spawn_script("fake_green_api.py", [
+            "--port", str(green_port), "--contacts", str(args.contacts),
+        ], f"{green_url}/_stats"))
+        router_log = open(workdir / "router.log", "w")
+        procs.append(spawn(
+            [sys.executable, str(ROOT / "app" / "app.py")], f"{router_url}/api/v1/health",
+            cwd=workdir, stdout=router_log, stderr=subprocess.STDOUT,
+            env={**os.environ, "ROUTER_PORT": str(router_port)},
+        ))
+        clients, latencies, errors, elapsed = asyncio.run(
+            hammer(router_url, args.concurrency, duration, args.contacts)
+        )
+        time.sleep(1)  # let the config watcher settle before reading the file
+        problems = verify(config_path, seeded, clients)
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    endpoints = {
+        label: {
+            "count": len(latencies[label]) + errors[label],
+            "errors": errors[label],
+            "rps": round(len(latencies[label]) / elapsed, 1),
+            "latency_ms": {p: percentile(latencies[label], int(p[1:])) for p in ("p50", "p95", "p99")},
+        }
+        for label in MIX
+    }
+    return {
+        "routes": n_routes,
+        "contacts": args.contacts,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "total_rps": round(sum(len(v) for v in latencies.values()) / elapsed, 1),
+        "endpoints": endpoints,
+        "integrity_problems": problems,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default="100,1000,10000", help="comma-separated seeded route counts")
+    parser.add_argument("--contacts", type=int, default=50000, help="contacts served by the fake Green API")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent API clients")
+    parser.add_argument("--duration", default="30s", help="load duration per route count")
+    parser.add_argument("-o", "--output", help="write JSON results here (default: stdout)")
+    args = parser.parse_args()
+    duration = parse_duration(args.duration)
+
+    results = []
+    for n_routes in (int(x) for x in args.routes.split(",")):
+        result = run_case(n_routes, args, duration)
+        results.append(result)
+        print(f"routes={n_routes}: {result['total_rps']} req/s, integrity: "
+              f"{'; '.join(result['integrity_problems']) or 'ok'}", file=sys.stderr)
+        for label, e in result["endpoints"].items():
+            print(f"    {label:<24} {e['rps']:>8.1f} req/s  p50={e['latency_ms']['p50']}ms "
+                  f"p95={e['latency_ms']['p95']}ms p99={e['latency_ms']['p99']}ms errors={e['errors']}",
+                  file=sys.stderr)
+
+    text = json.dumps({"results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    return 1 if any(r["integrity_problems"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+End-to-end soak test.
+
+Runs the unmodified router (app/app.py) as a subprocess. Its ``green_api.api_url``
+points at bench/fake_green_api.py, and its routes point at bench/stand_in_n8n.py.
+Messages flow at a steady rate for as long as requested. Every sample interval the
+harness records, as JSON lines:
+
+* router RSS, thread count, open sockets and file descriptors (from /proc, Linux)
+* dispatcher event-loop lag, queue depth and in-flight deliveries
+* API responsiveness (latency of /api/v1/health)
+* notifications generated / acknowledged by the poller, deliveries received by
+  the stand-in, injected webhook errors and end-to-end latency percentiles
+* with ``--reply``, replies the router sent back through sendMessage
+
+At the end it fits a trend to RSS, threads and sockets after the warm-up period.
+It exits non-zero if something keeps growing or if deliveries went missing:
+
+    python bench/soak.py --duration 4h --rate 20 --chats 50 --fanout 2 -o soak.jsonl
+    python bench/soak.py --duration 30m --restart-every 60   # poller restarts must not leak threads
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import yaml
+
+from fake_green_api import chat_ids
+from harness import ROOT, free_port, percentile, spawn, spawn_script
+
+
+def parse_duration(text: str) -> float:
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def proc_metrics(pid: int) -> dict:
+    status = Path(f"/proc/{pid}/status").read_text()
+    fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+    fds = sockets = 0
+    for fd in Path(f"/proc/{pid}/fd").iterdir():
+        fds += 1
+        try:
+            if os.readlink(fd).startswith("socket:"):
+                sockets += 1
+        except OSError:
+            pass
+    return {
+        "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 2),
+        "threads": int(fields["Threads"]),
+        "sockets": sockets,
+        "fds": fds,
+    }
+
+
+def slope_per_hour(samples: list[dict], key: str) -> float:
+    """Least-squares slope of ``key`` against elapsed time, in units per hour."""
+    xs = [s["elapsed_s"] / 3600 for s in samples]
+    ys = [s[key] for s in samples]
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+def write_config(workdir: Path, api_url: str, webhook_base: str, chats: int, fanout: int, reply: bool) -> None:
+    config = {
+        "green_api": {"instance_id": "1101000001", "token": "soak-token", "api_url": api_url},
+        "routes": {
+            chat_id: {
+                "name": f"Soak chat {i}",
+                "target_urls": [f"{webhook_base}/webhook/soak{i}/w{j}" for j in range(fanout)],
+                **({"reply": True} if reply else {}),
+            }
+            for i, chat_id in enumerate(chat_ids(chats))
+        },
+    }
+    if reply:
+        # The fake Green API has no send limits; don't let the reply throttle skew the run
+        config["replies"] = {"rate": 1000, "burst": 1000, "max_in_flight": 32}
+    (workdir / "config").mkdir(parents=True, exist_ok=True)
+    (workdir / "config" / "config.yaml").write_text(yaml.safe_dump(config))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", default="10m", help="e.g. 90s, 30m, 4h")
+    parser.add_argument("--rate", type=float, default=10, help="incoming messages per second")
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--fanout", type=int, default=1, help="webhooks per route")
+    parser.add_argument("--contacts", type=int, default=1000, help="getContacts list size")
+    parser.add_argument("--latency-ms", type=float, default=20, help="stand-in webhook latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="stand-in injected HTTP 500 ratio")
+    parser.add_argument("--reply", action="store_true", help="routes send webhook replies back via sendMessage")
+    parser.add_argument("--sample-every", default="10s")
+    parser.add_argument("--warmup", default="1m", help="ignored when fitting growth trends")
+    parser.add_argument("--restart-every", default="0", help="POST /api/v1/restart this often (0 = never)")
+    parser.add_argument("--max-rss-growth", type=float, default=20, help="MB per hour")
+    parser.add_argument("--max-thread-growth", type=int, default=2, help="threads above the post-warm-up level")
+    parser.add_argument("--max-socket-growth", type=int, default=10, help="sockets above the post-warm-up level")
+    parser.add_argument("--min-success", type=float, default=0.999, help="delivered / expected deliveries")
+    parser.add_argument("-o", "--output", help="JSON lines file for samples (default: stdout)")
+    args = parser.parse_args()
+
+    duration = parse_duration(args.duration)
+    sample_every = parse_duration(args.sample_every)
+    warmup = parse_duration(args.warmup)
+    restart_every = parse_duration(args.restart_every)
+
+    workdir = Path(tempfile.mkdtemp(prefix="router-soak-"))
+    green_port, n8n_port, router_port = free_port(), free_port(), free_port()
+    green_url = f"http://127.0.0.1:{green_port}"
+    n8n_url = f"http://127.0.0.1:{n8n_port}"
+    router_url = f"http://127.0.0.1:{router_port}"
+    write_config(workdir, green_url, n8n_url, args.chats, args.fanout, args.reply)
+
+    procs: list[subprocess.Popen] = []
+    out = open(args.output, "w") if args.output else sys.stdout
+    samples: list[dict] = []
+    latencies: list[float] = []
+    delivered = errors = 0
+    try:
+        procs.append(spawn_script("fake_green_api.py", [
+            "--port", str(green_port), "--rate", str(args.rate),
+            "--chats", str(args.chats), "--contacts", str(args.contacts),
+        ], f"{green_url}/_stats"))
+        procs.append(spawn_script("stand_in_n8n.py", [
+            "--port", str(n8n_port), "--latency-ms", str(args.latency_ms), "--error-rate", str(args.error_rate),
+            *(["--reply"] if args.reply else []),
+        ], f"{n8n_url}/_stats?latencies=0"))
+        router_log = open(workdir / "router.log", "w")
+        router = spawn(
+            [sys.executable, str(ROOT / "app" / "app.py")], f"{router_url}/api/v1/health",
+            cwd=workdir, stdout=router_log, stderr=subprocess.STDOUT,
+            env={**os.environ, "ROUTER_PORT": str(router_port)},
+        )
+        procs.append(router)
+        print(f"router pid {router.pid}, logs in {workdir / 'router.log'}", file=sys.stderr)
+
+        # Wait for the bot to finish start-up (it drains the queue first), then open the tap
+        while httpx.get(f"{green_url}/_stats").json()["polls"] == 0:
+            time.sleep(0.2)
+        httpx.post(f"{green_url}/_start")
+
+        started = time.monotonic()
+        next_restart = started + restart_every if restart_every else None
+        client = httpx.Client(timeout=10)
+        while True:
+            time.sleep(sample_every)
+            now = time.monotonic()
+            if router.poll() is not None:
+                print(f"router exited with code {router.returncode}", file=sys.stderr)
+                return 2
+            if next_restart and now >= next_restart:
+                client.post(f"{router_url}/api/v1/restart")
+                next_restart += restart_every
+
+            t0 = time.perf_counter()
+            client.get(f"{router_url}/api/v1/health")
+            api_ms = (time.perf_counter() - t0) * 1000
+            runtime = client.get(f"{router_url}/api/v1/stats/queues").json()
+            green = client.get(f"{green_url}/_stats").json()
+            window = client.get(f"{n8n_url}/_stats?reset=1").json()
+            delivered += window["received"]
+            errors += window["errors"]
+            latencies.extend(window["latencies_ms"])
+
+            sample = {
+                "elapsed_s": round(now - started, 1),
+                **proc_metrics(router.pid),
+                "loop_lag_ms": runtime["loop_lag_ms"],
+                "queue_depth": sum(runtime["lanes"].values()),
+                "in_flight": runtime["in_flight"],
+                "api_latency_ms": round(api_ms, 2),
+                "generated": green["generated"],
+                "acknowledged": green["deleted"],
+                "poll_backlog": green["backlog"],
+                "delivered": delivered,
+                "webhook_errors": errors,
+                "replies_sent": green["sent"],
+                "latency_p95_ms": percentile(window["latencies_ms"], 95),
+            }
+            samples.append(sample)
+            out.write(json.dumps(sample) + "\n")
+            out.flush()
+            print(
+                f"[{sample['elapsed_s']:>8.0f}s] rss={sample['rss_mb']}MB threads={sample['threads']} "
+                f"sockets={sample['sockets']} lag={sample['loop_lag_ms']}ms queue={sample['queue_depth']} "
+                f"acked={sample['acknowledged']} delivered={delivered}",
+                file=sys.stderr,
+            )
+            if now - started >= duration:
+                break
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    steady = [s for s in samples if s["elapsed_s"] >= warmup] or samples
+    first, last = steady[0], samples[-1]
+    # Deliveries still queued or in flight at the last sample are not counted as lost
+    expected = (last["acknowledged"] - last["queue_depth"] - last["in_flight"]) * args.fanout
+    summary = {
+        "duration_s": last["elapsed_s"],
+        "generated": last["generated"],
+        "acknowledged": last["acknowledged"],
+        "delivered": delivered,
+        "webhook_errors": errors,
+        "replies_sent": last["replies_sent"],
+        "delivery_success": round(delivered / expected, 5) if expected > 0 else None,
+        "latency_ms": {p: percentile(latencies, int(p[1:])) for p in ("p50", "p95", "p99")},
+        "rss_mb_per_hour": round(slope_per_hour(steady, "rss_mb"), 2),
+        "thread_growth": last["threads"] - first["threads"],
+        "socket_growth": last["sockets"] - first["sockets"],
+        "max_loop_lag_ms": max(s["loop_lag_ms"] for s in samples),
+        "final_poll_backlog": last["poll_backlog"],
+    }
+
+    problems = []
+    if summary["rss_mb_per_hour"] > args.max_rss_growth:
+        problems.append(f"RSS grows {summary['rss_mb_per_hour']} MB/h")
+    if summary["thread_growth"] > args.max_thread_growth:
+        problems.append(f"{summary['thread_growth']} more threads than after warm-up")
+    if summary["socket_growth"] > args.max_socket_growth:
+        problems.append(f"{summary['socket_growth']} more sockets than after warm-up")
+    if summary["delivery_success"] is not None and summary["delivery_success"] < args.min_success:
+        problems.append(f"delivery success {summary['delivery_success']}")
+    summary["problems"] = problems
+
+    print(json.dumps({"summary": summary}), file=out)
+    if out is not sys.stdout:
+        out.close()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Stand-in n8n webhook server for benchmarks and soak tests.
+
+Accepts POSTs on any /webhook/... path, waits a configurable latency and
+fails a configurable fraction of requests. With ``--reply`` it answers
+with a reply document for the router to send back to the chat. Payloads stamped by the benchmark
+with ``bench.sent_ns`` are timed on arrival, and the results can be read from
+GET /_stats (``?latencies=0`` for counters only, ``?reset=1`` to read and
+clear in one step; POST /_reset just clears them).
+
+    python bench/stand_in_n8n.py --port 8765 --latency-ms 20 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+
+class StandIn:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, reply: bool = False) -> None:
+        self.reply = reply
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.reset()
+
+    def reset(self) -> None:
+        self.received = 0
+        self.errors = 0
+        self.latencies_ms: list[float] = []
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        arrived_ns = time.time_ns()
+        body = await request.json()
+        self.received += 1
+        stamp = (body.get("payload") or {}).get("bench") or {}
+        if "sent_ns" in stamp:
+            self.latencies_ms.append((arrived_ns - stamp["sent_ns"]) / 1e6)
+
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"message": "injected error"}, status=500)
+        if self.reply:
+            text = (((body.get("payload") or {}).get("messageData") or {}).get("textMessageData") or {}).get("textMessage")
+            return web.json_response({"reply": {"message": f"echo: {text}", "quote": True}})
+        return web.json_response({"message": "Workflow was started"})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        data = {"received": self.received, "errors": self.errors}
+        if request.query.get("latencies", "1") != "0":
+            data["latencies_ms"] = self.latencies_ms
+        if request.query.get("reset") == "1":
+            self.reset()
+        return web.json_response(data)
+
+    async def reset_stats(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"message": "reset"})
+
+
+def build_app(latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+              reply: bool = False) -> web.Application:
+    stand_in = StandIn(latency_ms, jitter_ms, error_rate, reply)
+    app = web.Application()
+    app.router.add_post("/webhook/{name:.*}", stand_in.webhook)
+    app.router.add_get("/_stats", stand_in.stats)
+    app.router.add_post("/_reset", stand_in.reset_stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--reply", action="store_true", help="answer with a reply document")
+    args = parser.parse_args()
+    web.run_app(
+        build_app(args.latency_ms, args.jitter_ms, args.error_rate, args.reply),
+        host=args.host, port=args.port, print=None, access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,89 @@
+export type RateLimitPolicy = 'delay' | 'coalesce' | 'shed';
+
+export type RoutePriority = 'high' | 'normal' | 'low';
+
+export interface RateLimit {
+  rate?: number | null;
+  burst?: number | null;
+  max_in_flight?: number | null;
+  policy: RateLimitPolicy;
+}
+
+export type DeliveryMode = 'await' | 'fire_and_forget';
+
+export interface DeliveryPolicy {
+  timeout?: number | null;
+  mode?: DeliveryMode;
+  retries?: number;
+  hedge_url?: string | null;
+  hedge_after_ms?: number | null;
+}
+
+export interface MessageRules {
+  message_types?: string[];
+  keywords?: string[];
+  patterns?: string[];
+  senders?: string[];
+  case_sensitive?: boolean;
+}
+
+export interface RouteData {
+  name: string;
+  target_urls: string[];
+  rate_limit?: RateLimit | null;
+  priority?: RoutePriority;
+  rules?: MessageRules | null;
+  reply?: boolean;
+  delivery?: DeliveryPolicy | null;
+}
+
 export interface Route {
   chatId: string;
   name: string;
   targetUrls: string[];
+  rateLimit?: RateLimit | null;
+  priority?: RoutePriority;
+  rules?: MessageRules | null;
+  reply?: boolean;
+  delivery?: DeliveryPolicy | null;
 }
 
 export interface RouteCreate {
   chat_id: string;
   name: string;
   target_urls: string[];
+  rate_limit?: RateLimit | null;
+  priority?: RoutePriority;
+  rules?: MessageRules | null;
+  reply?: boolean;
+  delivery?: DeliveryPolicy | null;
 }
 
 export interface RouteUpdate {
   chat_id: string;
   name?: string;
   target_urls: string[];
+  rate_limit?: RateLimit | null;
+  priority?: RoutePriority;
+  rules?: MessageRules | null;
+  reply?: boolean;
+  delivery?: DeliveryPolicy | null;
+}
+
+export type BulkFormat = 'csv' | 'json';
+
+export interface ImportError {
+  line: number;
+  chat_id: string | null;
+  error: string;
+}
+
+export interface ImportReport {
+  dry_run: boolean;
+  rows: number;
+  created: number;
+  updated: number;
+  unchanged: number;
+  invalid: number;
+  errors: ImportError[];
 }
@@ -0,0 +1,19 @@
+export type TraceStage = 'green_api' | 'admission' | 'queue' | 'webhook' | 'total';
+
+export interface Trace {
+  id_message: string | null;
+  chat_id: string;
+  url: string;
+  status: number | null;
+  error: string | null;
+  stamps: Record<string, number | null>;
+  stages_ms: Partial<Record<TraceStage, number>>;
+}
+
+export interface StageSummary {
+  count: number;
+  p50: number;
+  p95: number;
+  p99: number;
+  max: number;
+}
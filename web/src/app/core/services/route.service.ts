@@ -1,15 +1,15 @@
 import { Injectable, inject } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { RouteCreate, RouteUpdate } from '../models/route.model';
+import { BulkFormat, ImportReport, RouteCreate, RouteData, RouteUpdate } from '../models/route.model';
 
 @Injectable({ providedIn: 'root' })
 export class RouteService {
   private http = inject(HttpClient);
   private base = '/api/v1/routes';
 
-  getRoutes(): Observable<{ routes: Record<string, { name: string; target_urls: string[] }> }> {
-    return this.http.get<{ routes: Record<string, { name: string; target_urls: string[] }> }>(this.base);
+  getRoutes(): Observable<{ routes: Record<string, RouteData> }> {
+    return this.http.get<{ routes: Record<string, RouteData> }>(this.base);
   }
 
   createRoute(data: RouteCreate): Observable<{ message: string }> {
@@ -30,4 +30,15 @@ export class RouteService {
       { name }
     );
   }
+
+  importRoutes(file: File, dryRun: boolean): Observable<ImportReport> {
+    const format: BulkFormat = file.name.toLowerCase().endsWith('.csv') ? 'csv' : 'json';
+    return this.http.post<ImportReport>(`${this.base}/import`, file, {
+      params: { format, dry_run: dryRun },
+    });
+  }
+
+  exportUrl(format: BulkFormat): string {
+    return `${this.base}/export?format=${format}`;
+  }
 }
@@ -0,0 +1,18 @@
+import { Injectable, inject } from '@angular/core';
+import { HttpClient } from '@angular/common/http';
+import { Observable } from 'rxjs';
+import { StageSummary, Trace, TraceStage } from '../models/trace.model';
+
+@Injectable({ providedIn: 'root' })
+export class TracesService {
+  private http = inject(HttpClient);
+  private base = '/api/v1/traces';
+
+  getTraces(limit = 100): Observable<{ traces: Trace[] }> {
+    return this.http.get<{ traces: Trace[] }>(this.base, { params: { limit } });
+  }
+
+  getSummary(): Observable<{ stages: Partial<Record<TraceStage, StageSummary>> }> {
+    return this.http.get<{ stages: Partial<Record<TraceStage, StageSummary>> }>(`${this.base}/summary`);
+  }
+}
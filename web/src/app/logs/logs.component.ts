@@ -1,14 +1,17 @@
 import { Component, Input, OnChanges, OnDestroy, OnInit, SimpleChanges, inject } from '@angular/core';
 import { DatePipe } from '@angular/common';
-import { Subscription } from 'rxjs';
+import { Subscription, forkJoin, switchMap, timer } from 'rxjs';
 import { MatButtonModule } from '@angular/material/button';
 import { MatIconModule } from '@angular/material/icon';
 import { MatChipsModule } from '@angular/material/chips';
 import { MatTooltipModule } from '@angular/material/tooltip';
+import { MatButtonToggleModule } from '@angular/material/button-toggle';
 import { ScrollingModule } from '@angular/cdk/scrolling';
 
 import { LogsService } from '../core/services/logs.service';
 import { LogEntry } from '../core/models/log-entry.model';
+import { TracesService } from '../core/services/traces.service';
+import { StageSummary, Trace, TraceStage } from '../core/models/trace.model';
 
 @Component({
   selector: 'app-logs',
@@ -17,6 +20,7 @@ import { LogEntry } from '../core/models/log-entry.model';
     DatePipe,
     MatButtonModule, MatIconModule,
     MatChipsModule, MatTooltipModule,
+    MatButtonToggleModule,
     ScrollingModule,
   ],
   template: `
@@ -28,12 +32,56 @@ import { LogEntry } from '../core/models/log-entry.model';
             {{ status === 'connected' ? 'Connected' : 'Disconnected' }}
           </mat-chip>
         </mat-chip-set>
+        <mat-button-toggle-group [value]="view" (change)="setView($event.value)" hideSingleSelectionIndicator>
+          <mat-button-toggle value="logs">Logs</mat-button-toggle>
+          <mat-button-toggle value="traces">Traces</mat-button-toggle>
+        </mat-button-toggle-group>
         <span class="spacer"></span>
-        <button mat-icon-button (click)="clearLogs()" matTooltip="Clear logs">
-          <mat-icon>clear_all</mat-icon>
-        </button>
+        @if (view === 'logs') {
+          <button mat-icon-button (click)="clearLogs()" matTooltip="Clear logs">
+            <mat-icon>clear_all</mat-icon>
+          </button>
+        }
       </div>
 
+      @if (view === 'traces') {
+        <div class="trace-summary">
+          @for (stage of stages; track stage) {
+            @if (summary[stage]; as s) {
+              <div class="trace-stat">
+                <span class="trace-stat-name">{{ stage }}</span>
+                <span>p50 {{ s.p50 }} · p95 {{ s.p95 }} · p99 {{ s.p99 }} ms</span>
+              </div>
+            }
+          }
+        </div>
+        <cdk-virtual-scroll-viewport itemSize="32" class="log-viewport">
+          @if (traces.length === 0) {
+            <div class="empty-logs">
+              <mat-icon>timer</mat-icon>
+              <p>No traces yet. Delivered messages will appear here.</p>
+            </div>
+          } @else {
+            <div class="trace-row trace-header">
+              <span class="trace-time">Time</span>
+              <span class="trace-target">Chat → Webhook</span>
+              @for (stage of stages; track stage) {
+                <span class="trace-ms">{{ stage }}</span>
+              }
+            </div>
+          }
+          <div *cdkVirtualFor="let trace of traces"
+               [class]="'trace-row ' + (trace.error || (trace.status ?? 0) >= 400 ? 'log-error' : 'log-success')">
+            <span class="trace-time">{{ (trace.stamps['received'] ?? 0) * 1000 | date:'HH:mm:ss' }}</span>
+            <span class="trace-target" [matTooltip]="trace.error || ('HTTP ' + trace.status)">
+              {{ trace.chat_id }} → {{ trace.url }}
+            </span>
+            @for (stage of stages; track stage) {
+              <span class="trace-ms">{{ trace.stages_ms[stage] ?? '–' }}</span>
+            }
+          </div>
+        </cdk-virtual-scroll-viewport>
+      } @else {
       <cdk-virtual-scroll-viewport itemSize="32" class="log-viewport">
         @if (entries.length === 0) {
           <div class="empty-logs">
@@ -47,6 +95,7 @@ import { LogEntry } from '../core/models/log-entry.model';
           <span class="log-msg">{{ entry.message }}</span>
         </div>
       </cdk-virtual-scroll-viewport>
+      }
     </div>
   `,
   styles: [`
@@ -88,6 +137,27 @@ import { LogEntry } from '../core/models/log-entry.model';
       align-items: center; justify-content: center;
       height: 200px; color: #64748b; gap: 8px;
     }
+    .trace-summary {
+      display: flex;
+      flex-wrap: wrap;
+      gap: 16px;
+      font-size: 12px;
+    }
+    .trace-stat { display: flex; gap: 6px; }
+    .trace-stat-name { font-weight: 500; }
+    .trace-row {
+      display: flex;
+      gap: 12px;
+      padding: 4px 12px;
+      align-items: baseline;
+      min-height: 32px;
+      color: #e2e8f0;
+    }
+    .trace-header { color: #64748b; }
+    .trace-row.log-error .trace-target { color: #f87171; }
+    .trace-time { color: #64748b; white-space: nowrap; width: 64px; flex-shrink: 0; }
+    .trace-target { flex: 1; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
+    .trace-ms { width: 80px; text-align: right; flex-shrink: 0; }
     .status-chip.status-connected   { color: #4ade80; }
     .status-chip.status-disconnected { color: #94a3b8; }
   `],
@@ -97,9 +167,15 @@ export class LogsComponent implements OnInit, OnChanges, OnDestroy {
 
   entries: LogEntry[] = [];
   status: 'connected' | 'disconnected' = 'disconnected';
+  view: 'logs' | 'traces' = 'logs';
+  traces: Trace[] = [];
+  summary: Partial<Record<TraceStage, StageSummary>> = {};
+  readonly stages: TraceStage[] = ['green_api', 'admission', 'queue', 'webhook', 'total'];
 
   private logsService = inject(LogsService);
+  private tracesService = inject(TracesService);
   private subs = new Subscription();
+  private polling?: Subscription;
 
   ngOnInit(): void {
     this.subs.add(this.logsService.entries$.subscribe(e => this.entries = e));
@@ -109,15 +185,34 @@ export class LogsComponent implements OnInit, OnChanges, OnDestroy {
   ngOnChanges(changes: SimpleChanges): void {
     if (changes['active']) {
       this.active ? this.logsService.connect() : this.logsService.disconnect();
+      this.updatePolling();
     }
   }
 
+  setView(view: 'logs' | 'traces'): void {
+    this.view = view;
+    this.updatePolling();
+  }
+
+  /** Poll traces only while the Traces view is visible. */
+  private updatePolling(): void {
+    this.polling?.unsubscribe();
+    this.polling = undefined;
+    if (!this.active || this.view !== 'traces') return;
+    this.polling = timer(0, 2000).pipe(
+      switchMap(() => forkJoin([this.tracesService.getTraces(), this.tracesService.getSummary()]))
+    ).subscribe({
+      next: ([t, s]) => { this.traces = t.traces; this.summary = s.stages; },
+    });
+  }
+
   clearLogs(): void {
     this.logsService.clear();
   }
 
   ngOnDestroy(): void {
     this.logsService.disconnect();
+    this.polling?.unsubscribe();
     this.subs.unsubscribe();
   }
 }
@@ -9,6 +9,8 @@ import { MatInputModule } from '@angular/material/input';
 import { MatButtonModule } from '@angular/material/button';
 import { MatIconModule } from '@angular/material/icon';
 import { MatAutocompleteModule } from '@angular/material/autocomplete';
+import { MatSelectModule } from '@angular/material/select';
+import { MatSlideToggleModule } from '@angular/material/slide-toggle';
 import { MatProgressSpinnerModule } from '@angular/material/progress-spinner';
 import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { CommonModule } from '@angular/common';
@@ -16,7 +18,16 @@ import { debounceTime, distinctUntilChanged, filter, switchMap } from 'rxjs/oper
 
 import { RouteService } from '../../core/services/route.service';
 import { ContactsService, Contact } from '../../core/services/contacts.service';
-import { Route } from '../../core/models/route.model';
+import { DeliveryPolicy, MessageRules, RateLimit, Route } from '../../core/models/route.model';
+
+const MESSAGE_TYPES = [
+  'textMessage', 'extendedTextMessage', 'quotedMessage', 'imageMessage', 'videoMessage',
+  'documentMessage', 'audioMessage', 'locationMessage', 'contactMessage', 'reactionMessage',
+];
+
+function splitList(value: string | null, separator: RegExp): string[] {
+  return (value ?? '').split(separator).map(v => v.trim()).filter(v => v);
+}
 
 function urlValidator(ctrl: AbstractControl): ValidationErrors | null {
   const v = (ctrl.value ?? '').trim();
@@ -29,6 +40,15 @@ function urlValidator(ctrl: AbstractControl): ValidationErrors | null {
   }
 }
 
+function hedgeValidator(group: AbstractControl): ValidationErrors | null {
+  const url = (group.get('hedgeUrl')?.value ?? '').trim();
+  const after = group.get('hedgeAfterMs')?.value;
+  const timeout = group.get('timeout')?.value;
+  if (!!url !== !!after) return { hedgePair: true };
+  if (after && timeout && after >= timeout * 1000) return { hedgeAfterTimeout: true };
+  return null;
+}
+
 @Component({
   selector: 'app-route-dialog',
   standalone: true,
@@ -36,7 +56,7 @@ function urlValidator(ctrl: AbstractControl): ValidationErrors | null {
     CommonModule, ReactiveFormsModule,
     MatDialogModule, MatFormFieldModule, MatInputModule,
     MatButtonModule, MatIconModule, MatAutocompleteModule,
-    MatProgressSpinnerModule, MatSnackBarModule,
+    MatSelectModule, MatSlideToggleModule, MatProgressSpinnerModule, MatSnackBarModule,
   ],
   template: `
     <h2 mat-dialog-title>{{ isEdit ? 'Edit Route' : 'Add New Route' }}</h2>
@@ -109,6 +129,117 @@ function urlValidator(ctrl: AbstractControl): ValidationErrors | null {
           </button>
         </div>
 
+        <mat-form-field appearance="outline" class="full-width">
+          <mat-label>Priority</mat-label>
+          <mat-select formControlName="priority">
+            <mat-option value="high">High — VIP chats, served first under load</mat-option>
+            <mat-option value="normal">Normal</mat-option>
+            <mat-option value="low">Low — bulk or noisy chats</mat-option>
+          </mat-select>
+        </mat-form-field>
+
+        <mat-slide-toggle formControlName="reply" class="reply-toggle">
+          Send webhook replies back to the chat
+        </mat-slide-toggle>
+        <p class="hint">If n8n responds with <code>{{ '{' }}"reply": "text"{{ '}' }}</code>, the router sends it via Green API.</p>
+
+        <div class="limits-section" formGroupName="rateLimit">
+          <p class="section-label">Rate limit (optional)</p>
+          <div class="limits-row">
+            <mat-form-field appearance="outline">
+              <mat-label>Messages / second</mat-label>
+              <input matInput type="number" min="0" step="any" formControlName="rate">
+            </mat-form-field>
+            <mat-form-field appearance="outline">
+              <mat-label>Burst</mat-label>
+              <input matInput type="number" min="1" step="1" formControlName="burst">
+            </mat-form-field>
+          </div>
+          <div class="limits-row">
+            <mat-form-field appearance="outline">
+              <mat-label>Max in flight</mat-label>
+              <input matInput type="number" min="1" step="1" formControlName="maxInFlight">
+            </mat-form-field>
+            <mat-form-field appearance="outline">
+              <mat-label>When over limit</mat-label>
+              <mat-select formControlName="policy">
+                <mat-option value="delay">Delay</mat-option>
+                <mat-option value="coalesce">Coalesce (keep newest)</mat-option>
+                <mat-option value="shed">Shed (drop)</mat-option>
+              </mat-select>
+            </mat-form-field>
+          </div>
+        </div>
+
+        <div class="limits-section" formGroupName="delivery">
+          <p class="section-label">Delivery (optional)</p>
+          <div class="limits-row">
+            <mat-form-field appearance="outline">
+              <mat-label>Timeout (seconds)</mat-label>
+              <input matInput type="number" min="0" max="300" step="any" formControlName="timeout">
+            </mat-form-field>
+            <mat-form-field appearance="outline">
+              <mat-label>Mode</mat-label>
+              <mat-select formControlName="mode">
+                <mat-option value="await">Await response</mat-option>
+                <mat-option value="fire_and_forget">Fire and forget</mat-option>
+              </mat-select>
+            </mat-form-field>
+          </div>
+          <mat-form-field appearance="outline" class="full-width">
+            <mat-label>Retries</mat-label>
+            <input matInput type="number" min="0" max="10" step="1" formControlName="retries">
+            <mat-hint>After a timeout, connection error, 429 or 5xx</mat-hint>
+          </mat-form-field>
+          <div class="limits-row">
+            <mat-form-field appearance="outline">
+              <mat-label>Hedge URL</mat-label>
+              <input matInput formControlName="hedgeUrl" placeholder="https://n8n-2.example.com/webhook/...">
+              @if (form.get('delivery.hedgeUrl').hasError('url')) {
+                <mat-error>Must be a valid http/https URL</mat-error>
+              }
+            </mat-form-field>
+            <mat-form-field appearance="outline">
+              <mat-label>Hedge after (ms)</mat-label>
+              <input matInput type="number" min="1" step="1" formControlName="hedgeAfterMs">
+            </mat-form-field>
+          </div>
+          @if (form.get('delivery').hasError('hedgePair')) {
+            <p class="hint error">Set both the hedge URL and the delay, or neither.</p>
+          }
+          @if (form.get('delivery').hasError('hedgeAfterTimeout')) {
+            <p class="hint error">The hedge delay must be shorter than the timeout.</p>
+          }
+        </div>
+
+        <div class="limits-section" formGroupName="rules">
+          <p class="section-label">Content rules (optional) — forward only matching messages</p>
+          <mat-form-field appearance="outline" class="full-width">
+            <mat-label>Message types</mat-label>
+            <mat-select formControlName="messageTypes" multiple>
+              @for (t of messageTypes; track t) {
+                <mat-option [value]="t">{{ t }}</mat-option>
+              }
+            </mat-select>
+            <mat-hint>Leave empty to accept every type</mat-hint>
+          </mat-form-field>
+          <mat-form-field appearance="outline" class="full-width">
+            <mat-label>Keywords</mat-label>
+            <input matInput formControlName="keywords" placeholder="invoice, refund, order status">
+            <mat-hint>Comma-separated whole words or phrases</mat-hint>
+          </mat-form-field>
+          <mat-form-field appearance="outline" class="full-width">
+            <mat-label>Regular expressions</mat-label>
+            <textarea matInput formControlName="patterns" rows="2" placeholder="order #\\d+"></textarea>
+            <mat-hint>One per line; a match on any keyword or expression is enough</mat-hint>
+          </mat-form-field>
+          <mat-form-field appearance="outline" class="full-width">
+            <mat-label>Group senders</mat-label>
+            <input matInput formControlName="senders" placeholder="972501234567@c.us">
+            <mat-hint>Comma-separated participant IDs</mat-hint>
+          </mat-form-field>
+        </div>
+
       </form>
     </mat-dialog-content>
 
@@ -130,6 +261,12 @@ function urlValidator(ctrl: AbstractControl): ValidationErrors | null {
     .url-field { flex: 1; }
     .webhooks-section { display: flex; flex-direction: column; }
     .section-label { margin: 8px 0 4px; font-size: 13px; opacity: 0.7; }
+    .limits-section { display: flex; flex-direction: column; }
+    .reply-toggle { margin-top: 8px; }
+    .hint { margin: 4px 0 0; font-size: 12px; opacity: 0.6; }
+    .hint.error { color: var(--mat-sys-error, #d32f2f); opacity: 1; }
+    .limits-row { display: flex; gap: 8px; }
+    .limits-row mat-form-field { flex: 1; }
     .contact-option { display: flex; flex-direction: column; line-height: 1.4; }
     .contact-id { font-size: 11px; opacity: 0.6; }
   `],
@@ -139,6 +276,7 @@ export class RouteDialogComponent implements OnInit {
   form!: any;
   saving = false;
   filteredContacts: Contact[] = [];
+  readonly messageTypes = MESSAGE_TYPES;
   isEdit: boolean;
   routeData: Route;
 
@@ -157,6 +295,9 @@ export class RouteDialogComponent implements OnInit {
   ngOnInit(): void {
     const initialUrls = this.isEdit && this.routeData.targetUrls.length
       ? this.routeData.targetUrls : [''];
+    const limit = this.routeData.rateLimit;
+    const rules = this.routeData.rules;
+    const delivery = this.routeData.delivery;
 
     this.form = this.fb.group({
       name: [this.isEdit ? this.routeData.name : '', Validators.required],
@@ -164,6 +305,27 @@ export class RouteDialogComponent implements OnInit {
       targetUrls: this.fb.array(
         initialUrls.map(url => new FormControl(url, [Validators.required, urlValidator]))
       ),
+      priority: [this.routeData.priority ?? 'normal'],
+      reply: [this.routeData.reply ?? false],
+      rateLimit: this.fb.group({
+        rate: [limit?.rate ?? null, Validators.min(0.001)],
+        burst: [limit?.burst ?? null, Validators.min(1)],
+        maxInFlight: [limit?.max_in_flight ?? null, Validators.min(1)],
+        policy: [limit?.policy ?? 'delay'],
+      }),
+      delivery: this.fb.group({
+        timeout: [delivery?.timeout ?? null, [Validators.min(0.001), Validators.max(300)]],
+        mode: [delivery?.mode ?? 'await'],
+        retries: [delivery?.retries ?? null, [Validators.min(0), Validators.max(10)]],
+        hedgeUrl: [delivery?.hedge_url ?? '', urlValidator],
+        hedgeAfterMs: [delivery?.hedge_after_ms ?? null, Validators.min(1)],
+      }, { validators: hedgeValidator }),
+      rules: this.fb.group({
+        messageTypes: [rules?.message_types ?? []],
+        keywords: [(rules?.keywords ?? []).join(', ')],
+        patterns: [(rules?.patterns ?? []).join('\n')],
+        senders: [(rules?.senders ?? []).join(', ')],
+      }),
     });
 
     if (!this.isEdit) {
@@ -195,6 +357,44 @@ export class RouteDialogComponent implements OnInit {
     (this.form.get('targetUrls') as FormArray).removeAt(i);
   }
 
+  private buildRateLimit(v: { rate: number | null; burst: number | null; maxInFlight: number | null;
+                                policy: RateLimit['policy'] }): RateLimit | null {
+    if (!v.rate && !v.maxInFlight) return null;
+    return {
+      rate: v.rate || null,
+      burst: v.burst || null,
+      max_in_flight: v.maxInFlight || null,
+      policy: v.policy,
+    };
+  }
+
+  private buildDelivery(v: { timeout: number | null; mode: DeliveryPolicy['mode']; retries: number | null;
+                              hedgeUrl: string; hedgeAfterMs: number | null }): DeliveryPolicy | null {
+    const hedgeUrl = (v.hedgeUrl ?? '').trim();
+    if (!v.timeout && v.mode === 'await' && !v.retries && !hedgeUrl) return null;
+    return {
+      timeout: v.timeout || null,
+      mode: v.mode,
+      retries: v.retries || 0,
+      hedge_url: hedgeUrl || null,
+      hedge_after_ms: hedgeUrl ? v.hedgeAfterMs : null,
+    };
+  }
+
+  private buildRules(v: { messageTypes: string[]; keywords: string; patterns: string;
+                          senders: string }): MessageRules | null {
+    const rules: MessageRules = {
+      message_types: v.messageTypes ?? [],
+      keywords: splitList(v.keywords, /,/),
+      patterns: splitList(v.patterns, /\n/),
+      senders: splitList(v.senders, /,/),
+      case_sensitive: this.routeData.rules?.case_sensitive ?? false,
+    };
+    const empty = !rules.message_types!.length && !rules.keywords!.length
+      && !rules.patterns!.length && !rules.senders!.length;
+    return empty ? null : rules;
+  }
+
   save(): void {
     this.form.markAllAsTouched();
     if (this.form.invalid) return;
@@ -212,6 +412,11 @@ export class RouteDialogComponent implements OnInit {
       chat_id: chatId,
       name: raw.name ?? chatId,
       target_urls: (raw.targetUrls as string[]).map((u: string) => u.trim()),
+      rate_limit: this.buildRateLimit(raw.rateLimit),
+      priority: raw.priority,
+      rules: this.buildRules(raw.rules),
+      delivery: this.buildDelivery(raw.delivery),
+      reply: raw.reply,
     };
 
     const op$ = this.isEdit
@@ -11,7 +11,7 @@ import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { MAT_DIALOG_DATA } from '@angular/material/dialog';
 
 import { RouteService } from '../core/services/route.service';
-import { Route } from '../core/models/route.model';
+import { BulkFormat, ImportReport, Route } from '../core/models/route.model';
 import { RouteDialogComponent } from './route-dialog/route-dialog.component';
 
 @Component({
@@ -25,6 +25,22 @@ import { RouteDialogComponent } from './route-dialog/route-dialog.component';
   ],
   template: `
     <div class="routes-container">
+      <div class="toolbar">
+        <input #importFile type="file" accept=".csv,.json,.jsonl,.ndjson" hidden
+               (change)="onImportFile(importFile)" />
+        <button mat-stroked-button [disabled]="importing" (click)="importFile.click()"
+                matTooltip="Create or update routes from a CSV or JSON Lines file">
+          <mat-icon>upload</mat-icon> Import
+        </button>
+        <a mat-stroked-button [href]="exportUrl('csv')" download>
+          <mat-icon>download</mat-icon> Export CSV
+        </a>
+        <a mat-stroked-button [href]="exportUrl('json')" download
+           matTooltip="Includes rate limits and content rules">
+          <mat-icon>download</mat-icon> Export JSON
+        </a>
+      </div>
+
       @if (loading) {
         <div class="center-state">
           <mat-spinner diameter="48" />
@@ -60,6 +76,56 @@ import { RouteDialogComponent } from './route-dialog/route-dialog.component';
                     {{ route.targetUrls.length }}
                     webhook{{ route.targetUrls.length !== 1 ? 's' : '' }}
                   </mat-chip>
+                  @if (route.priority && route.priority !== 'normal') {
+                    <mat-chip matTooltip="Delivery priority lane">
+                      <mat-icon matChipAvatar>{{ route.priority === 'high' ? 'keyboard_double_arrow_up' : 'keyboard_double_arrow_down' }}</mat-icon>
+                      {{ route.priority }} priority
+                    </mat-chip>
+                  }
+                  @if (route.rateLimit) {
+                    <mat-chip [matTooltip]="'Over-limit policy: ' + route.rateLimit.policy">
+                      <mat-icon matChipAvatar>speed</mat-icon>
+                      @if (route.rateLimit.rate) { {{ route.rateLimit.rate }}/s }
+                      @if (route.rateLimit.rate && route.rateLimit.max_in_flight) { · }
+                      @if (route.rateLimit.max_in_flight) { ≤{{ route.rateLimit.max_in_flight }} in flight }
+                    </mat-chip>
+                  }
+                  @if (route.rules) {
+                    <mat-chip matTooltip="Only messages matching the content rules are forwarded">
+                      <mat-icon matChipAvatar>filter_alt</mat-icon>
+                      Filtered
+                    </mat-chip>
+                  }
+                  @if (route.delivery?.mode === 'fire_and_forget') {
+                    <mat-chip matTooltip="Webhook responses are not awaited by a worker">
+                      <mat-icon matChipAvatar>send</mat-icon>
+                      Fire &amp; forget
+                    </mat-chip>
+                  }
+                  @if (route.delivery?.timeout) {
+                    <mat-chip matTooltip="Webhook call timeout">
+                      <mat-icon matChipAvatar>timer</mat-icon>
+                      {{ route.delivery!.timeout }}s
+                    </mat-chip>
+                  }
+                  @if (route.delivery?.retries) {
+                    <mat-chip matTooltip="Retries after a timeout, connection error, 429 or 5xx">
+                      <mat-icon matChipAvatar>replay</mat-icon>
+                      {{ route.delivery!.retries }} retr{{ route.delivery!.retries === 1 ? 'y' : 'ies' }}
+                    </mat-chip>
+                  }
+                  @if (route.delivery?.hedge_url) {
+                    <mat-chip [matTooltip]="'Also calls ' + route.delivery!.hedge_url + ' after ' + route.delivery!.hedge_after_ms + ' ms'">
+                      <mat-icon matChipAvatar>call_split</mat-icon>
+                      Hedged
+                    </mat-chip>
+                  }
+                  @if (route.reply) {
+                    <mat-chip matTooltip="Replies in webhook responses are sent back to the chat">
+                      <mat-icon matChipAvatar>reply</mat-icon>
+                      Replies
+                    </mat-chip>
+                  }
                 </mat-chip-set>
               </mat-card-content>
               <mat-card-actions align="end">
@@ -93,6 +159,13 @@ import { RouteDialogComponent } from './route-dialog/route-dialog.component';
       position: relative;
       min-height: calc(100vh - 160px);
     }
+    .toolbar {
+      display: flex;
+      flex-wrap: wrap;
+      justify-content: flex-end;
+      gap: 8px;
+      margin-bottom: 16px;
+    }
     .cards-grid {
       display: grid;
       grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
@@ -131,6 +204,7 @@ import { RouteDialogComponent } from './route-dialog/route-dialog.component';
 export class RoutesComponent implements OnInit {
   routes: Route[] = [];
   loading = false;
+  importing = false;
 
   private routeSvc = inject(RouteService);
   private dialog = inject(MatDialog);
@@ -148,6 +222,11 @@ export class RoutesComponent implements OnInit {
           chatId,
           name: r.name || chatId,
           targetUrls: r.target_urls || [],
+          rateLimit: r.rate_limit ?? null,
+          priority: r.priority ?? 'normal',
+          rules: r.rules ?? null,
+          reply: r.reply ?? false,
+          delivery: r.delivery ?? null,
         })).sort((a, b) => a.name.localeCompare(b.name));
         this.loading = false;
       },
@@ -171,6 +250,64 @@ export class RoutesComponent implements OnInit {
     }).afterClosed().subscribe(saved => { if (saved) this.loadRoutes(); });
   }
 
+  exportUrl(format: BulkFormat): string {
+    return this.routeSvc.exportUrl(format);
+  }
+
+  onImportFile(input: HTMLInputElement): void {
+    const file = input.files?.[0];
+    input.value = '';
+    if (!file) return;
+    this.importing = true;
+    // Dry run first, so the user sees what will change before anything is written
+    this.routeSvc.importRoutes(file, true).subscribe({
+      next: report => {
+        this.importing = false;
+        if (report.invalid > 0) {
+          const first = report.errors[0];
+          this.snackBar.open(
+            `${report.invalid} invalid row${report.invalid !== 1 ? 's' : ''}; line ${first.line}: ${first.error}`,
+            'Dismiss',
+          );
+        } else if (report.created + report.updated === 0) {
+          this.snackBar.open(`Nothing to import: all ${report.rows} routes are unchanged`, undefined, { duration: 3000 });
+        } else {
+          this.confirmImport(file, report);
+        }
+      },
+      error: err => {
+        this.importing = false;
+        const detail = typeof err.error?.detail === 'string' ? err.error.detail : 'Failed to read import file';
+        this.snackBar.open(detail, 'Dismiss', { duration: 5000 });
+      },
+    });
+  }
+
+  private confirmImport(file: File, report: ImportReport): void {
+    this.dialog.open(ConfirmDialogComponent, {
+      data: {
+        message: `Import ${file.name}? ${report.created} new, ${report.updated} updated, ` +
+          `${report.unchanged} unchanged.`,
+        action: 'Import',
+      },
+      width: '360px',
+    }).afterClosed().subscribe(confirmed => {
+      if (!confirmed) return;
+      this.importing = true;
+      this.routeSvc.importRoutes(file, false).subscribe({
+        next: result => {
+          this.importing = false;
+          this.snackBar.open(`Imported ${result.created + result.updated} routes`, undefined, { duration: 2000 });
+          this.loadRoutes();
+        },
+        error: () => {
+          this.importing = false;
+          this.snackBar.open('Failed to import routes', 'Dismiss', { duration: 3000 });
+        },
+      });
+    });
+  }
+
   confirmDelete(route: Route): void {
     this.dialog.open(ConfirmDialogComponent, {
       data: { message: `Delete route for "${route.name}"? This cannot be undone.` },
@@ -200,7 +337,9 @@ export class RoutesComponent implements OnInit {
     <mat-dialog-content>{{ data.message }}</mat-dialog-content>
     <mat-dialog-actions align="end">
       <button mat-button mat-dialog-close>Cancel</button>
-      <button mat-raised-button color="warn" [mat-dialog-close]="true">Delete</button>
+      <button mat-raised-button [color]="data.action ? 'primary' : 'warn'" [mat-dialog-close]="true">
+        {{ data.action ?? 'Delete' }}
+      </button>
     </mat-dialog-actions>
   `,
 })